@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# Micro-benchmark of the Meta wrapper in hot template loops.
+#
+# Usage: python3 benchmarks/bench_meta.py [number of items]
+
+from jinja2 import Environment
+
+import timeit
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mell.main import Meta
+
+
+def create_metadata(n):
+    return {
+        'users': [
+            {
+                'name': f'user{i}', 
+                'address': {'city': 'Natal', 'zip': i}, 
+                'tags': ['a', 'b', 'c']
+            } for i in range(n)
+        ]
+    }
+
+def bench_python_loop(meta):
+    total = 0
+    for user in meta.users:
+        total += user.address.zip
+        total += len(user.name)
+        if user.missing.field:
+            total += 1
+    return total
+
+def bench_repeated_lookups(meta):
+    total = 0
+    users = meta.users
+    for i in range(len(users)):
+        total += users[i].address.zip
+        total += users[i].address.zip
+    return total
+
+def main():
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    meta = Meta(create_metadata(n))
+
+    template = Environment(trim_blocks=True, lstrip_blocks=True).from_string(
+        "{% for user in meta.users %}{{ user.name }},{{ user.address.city }},{{ user.address.zip }}"
+        "{% for tag in user.tags %}{{ tag }}{% endfor %}{% if user.missing.field %}!{% endif %}\n{% endfor %}")
+
+    scenarios = [
+        ('python loop', lambda: bench_python_loop(meta)),
+        ('repeated lookups', lambda: bench_repeated_lookups(meta)),
+        ('template loop', lambda: template.render(meta=meta)),
+    ]
+
+    print(f"Meta micro-benchmark with {n} items (best of 5)")
+
+    for name, function in scenarios:
+        elapsed = min(timeit.repeat(function, number=1, repeat=5))
+        print(f"  {name:20s} {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# Benchmark of the whole rendering pipeline over synthetic projects.
+#
+# Each scenario creates a project, runs mell on it in a separate process and
+# reports files/s, MB/s and peak RSS. The time spent in each step is taken from
+# one more run with --profile, which is not timed, as its spans slow mell down.
+# Results can be saved as JSON and compared against a baseline.
+#
+# Usage: python3 benchmarks/bench_pipeline.py [--scale N] [--repeat N] [--only NAME]
+#                                             [--output FILE] [--baseline FILE] [--tolerance PCT]
+
+from subprocess import Popen, DEVNULL
+
+import argparse
+import tempfile
+import platform
+import shutil
+import json
+import time
+import sys
+import os
+
+
+MELL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mell', 'main.py')
+
+def write_file(filepath, data):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w') as fout:
+        fout.write(data)
+
+def write_json(filepath, data):
+    write_file(filepath, json.dumps(data))
+
+def create_users(n):
+    return [{'name': f'user{i}', 'address': {'city': 'Natal', 'zip': i}, 'tags': ['a', 'b', 'c']} for i in range(n)]
+
+def scenario_many_small_templates(root, scale):
+    write_json(os.path.join(root, 'meta', 'data.json'), {'title': 'Small', 'users': create_users(10)})
+    for i in range(1000 * scale):
+        write_file(os.path.join(root, 'style', 'templates', f'{i % 50}', f'page_{i}.txt'),
+            "|= meta.title =| |? for user in meta.users ?||= user.name =| |? endfor ?|\n")
+
+def scenario_huge_templates(root, scale):
+    write_json(os.path.join(root, 'meta', 'data.json'), {'users': create_users(20000 * scale)})
+    for i in range(4):
+        write_file(os.path.join(root, 'style', 'templates', f'huge_{i}.txt'),
+            "|? for user in meta.users ?||= user.name =|,|= user.address.city =|,|= user.address.zip =|,"
+            "|? for tag in user.tags ?||= tag =||? endfor ?|\n|? endfor ?|")
+
+def scenario_deep_parents(root, scale):
+    depth = 200 * scale
+    for i in range(depth):
+        data = {f'key_{i}': i, 'shared': {f'level_{i}': create_users(5)}}
+        if i > 0:
+            data['__parent__'] = f'level_{i - 1}'
+        write_json(os.path.join(root, 'meta', f'level_{i}.json'), data)
+    write_file(os.path.join(root, 'style', 'templates', 'keys.txt'), "|? for key in meta.shared ?||= key =|\n|? endfor ?|")
+    return [f'level_{depth - 1}']
+
+def scenario_large_lists(root, scale):
+    write_json(os.path.join(root, 'meta', 'data.json'), {'users': create_users(50000 * scale)})
+    write_file(os.path.join(root, 'style', 'templates', 'count.txt'),
+        "|? for user in meta.users ?||? if user.address.zip % 1000 == 0 ?||= user.name =| |? endif ?||? if user.missing.field ?|!|? endif ?||? endfor ?|")
+
+def scenario_heavy_generators(root, scale):
+    write_json(os.path.join(root, 'meta', 'data.json'), {'users': create_users(500 * scale)})
+    write_file(os.path.join(root, 'style', 'assets', 'user.txt'), "|= meta.name =| lives in |= meta.address.city =| (|= meta.address.zip =|)\n")
+    for i in range(4):
+        write_file(os.path.join(root, 'style', 'generators', f'users_{i}.py'),
+            "def generate(args, meta, inflater):\n"
+            "    for j, user in enumerate(meta.users):\n"
+            f"        inflater.inflate('user.txt', user, to_file='users_{i}/' + str(j) + '.txt')\n")
+
+def scenario_large_statics(root, scale):
+    write_json(os.path.join(root, 'meta', 'data.json'), {})
+    data = 'x' * 4096
+    for i in range(2000 * scale):
+        write_file(os.path.join(root, 'style', 'statics', f'{i % 20}', f'{i % 7}', f'file_{i}.bin'), data)
+
+SCENARIOS = {
+    'many_small_templates': scenario_many_small_templates,
+    'huge_templates': scenario_huge_templates,
+    'deep_parents': scenario_deep_parents,
+    'large_lists': scenario_large_lists,
+    'heavy_generators': scenario_heavy_generators,
+    'large_statics': scenario_large_statics,
+}
+
+def create_project(root, scenario, scale):
+    for name in ['templates', 'assets', 'migrations', 'generators', 'statics']:
+        os.makedirs(os.path.join(root, 'style', name), exist_ok=True)
+    os.makedirs(os.path.join(root, 'meta'), exist_ok=True)
+    return SCENARIOS[scenario](root, scale) or ['data']
+
+def measure_output(folderpath):
+    files = 0
+    size = 0
+    for dirpath, _, filenames in os.walk(folderpath):
+        for filename in filenames:
+            if not filename.startswith('.'):
+                files += 1
+                size += os.path.getsize(os.path.join(dirpath, filename))
+    return files, size
+
+def run_mell(root, metadata, extra):
+
+    cmd = [sys.executable, MELL, '--root', root, *extra, *metadata]
+    start = time.perf_counter()
+    process = Popen(cmd, stdout=DEVNULL, stderr=DEVNULL)
+    _, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"mell failed: {' '.join(cmd)}")
+
+    # ru_maxrss is reported in KiB on linux and in bytes on macos
+
+    peak_rss = rusage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    return elapsed, peak_rss
+
+def profile_mell(root, metadata, extra):
+
+    run_mell(root, metadata, ['--profile', *extra])
+
+    with open(os.path.join(root, '.mell', 'profile.json')) as fin:
+        events = json.loads(fin.read())['traceEvents']
+
+    phases = {}
+    for event in events:
+        phases[event['cat']] = phases.get(event['cat'], 0.0) + event['dur'] / 1e6
+
+    return phases
+
+def run_scenario(scenario, scale, repeat, extra):
+
+    root = tempfile.mkdtemp(prefix=f'mell-bench-{scenario}-')
+
+    try:
+        metadata = create_project(root, scenario, scale)
+        runs = [run_mell(root, metadata, extra) for _ in range(repeat)]
+        elapsed, peak_rss = min(runs, key=lambda x: x[0])
+        files, size = measure_output(os.path.join(root, 'output'))
+        phases = profile_mell(root, metadata, extra)
+    finally:
+        shutil.rmtree(root)
+
+    return {
+        'seconds': elapsed,
+        'files': files,
+        'bytes': size,
+        'files_per_second': files / elapsed,
+        'mb_per_second': size / elapsed / 1e6,
+        'peak_rss_mb': peak_rss / 1e6,
+        'phases': phases
+    }
+
+def compare(results, baseline, tolerance):
+
+    regressions = []
+
+    for scenario, result in results.items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if previous is None:
+            continue
+
+        change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100
+        status = 'REGRESSION' if change > tolerance else 'ok'
+        print(f"  {scenario:24s} {previous['seconds']:8.3f}s -> {result['seconds']:8.3f}s  {change:+7.1f}%  {status}")
+
+        if change > tolerance:
+            regressions.append(scenario)
+
+    return regressions
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Benchmark mell over synthetic projects")
+    parser.add_argument('--scale', type=int, default=1, help="multiplies the size of every scenario")
+    parser.add_argument('--repeat', type=int, default=3, help="number of runs per scenario, the fastest one is reported")
+    parser.add_argument('--only', action='append', choices=list(SCENARIOS), help="run only the given scenario(s)")
+    parser.add_argument('--jobs', type=int, default=1, help="value passed to mell --jobs")
+    parser.add_argument('--output', help="save the results as JSON in this file")
+    parser.add_argument('--baseline', help="compare the results against a JSON file saved with --output")
+    parser.add_argument('--tolerance', type=float, default=10.0, help="slowdown, in percent, accepted before a regression is reported")
+    return parser.parse_args()
+
+def main():
+
+    args = parse_args()
+    scenarios = args.only or list(SCENARIOS)
+    extra = ['--jobs', str(args.jobs)]
+    results = {}
+
+    print(f"Pipeline benchmark, scale {args.scale}, best of {args.repeat}")
+
+    for scenario in scenarios:
+        result = results[scenario] = run_scenario(scenario, args.scale, args.repeat, extra)
+        print(f"  {scenario:24s} {result['seconds']:8.3f}s {result['files_per_second']:10.1f} files/s "
+              f"{result['mb_per_second']:8.2f} MB/s {result['peak_rss_mb']:8.1f} MB RSS")
+
+    report = {
+        'scale': args.scale,
+        'jobs': args.jobs,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scenarios': results
+    }
+
+    if args.output:
+        write_json(args.output, report)
+
+    if args.baseline:
+        with open(args.baseline) as fin:
+            baseline = json.loads(fin.read())
+
+        print(f"Comparison with {args.baseline}")
+        regressions = compare(results, baseline, args.tolerance)
+
+        if regressions:
+            print("Regressions:", ', '.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
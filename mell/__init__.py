@@ -1 +1,3 @@
 name = "mell"
+
+from .main import Project, Build, MellError
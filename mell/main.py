@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+# jinja2 and concurrent.futures are imported only by the functions that use 
+# them, so commands like --new or --do statics start fast.
 
 try:
     from . import consts
 except ImportError:
     import consts
 
-import importlib.util
+from collections import OrderedDict
+
 import argparse
+import marshal
+import threading
+import io
+import pickle
+import locale
+import hashlib
+import copy
 import shutil
+import stat
 import json
 import glob
 import time
@@ -19,6 +29,10 @@ import re
 
 
 LOG_LEVEL = 2
+WORKER = None
+TRACER = None
+PROFILER = None
+READONLY_META = False
 
 def debug(*args):
     if LOG_LEVEL <= 0:
@@ -33,9 +47,24 @@ def warn(*args):
         print("WARN:", *args)
 
 def error(*args):
+    raise MellError(' '.join(str(x) for x in args))
+
+def show_error(e):
     if LOG_LEVEL <= 3:
-        print("ERROR:", *args)
-    sys.exit(1)
+        print("ERROR:", e)
+
+
+class MellError(Exception):
+    pass
+
+
+def format_exception():
+    import traceback
+    return traceback.format_exc()
+
+def redirect_stdout(stream):
+    import contextlib
+    return contextlib.redirect_stdout(stream)
 
 def run_new_root(args):
 
@@ -103,7 +132,42 @@ def run_new_migration(args):
     
     sys.exit(0)
 
-def parse_args():
+DERIVED_FOLDERS = [
+    ('output', 'root', 'output'),
+    ('meta', 'root', 'meta'),
+    ('cache', 'root', '.mell'),
+    ('style', 'root', 'style'),
+    ('statics', 'style', 'statics'),
+    ('templates', 'style', 'templates'),
+    ('generators', 'style', 'generators'),
+    ('assets', 'style', 'assets'),
+    ('migrations', 'style', 'migrations'),
+]
+
+def resolve_folders(args):
+
+    for name, parent, foldername in DERIVED_FOLDERS:
+        if getattr(args, name) is None:
+            setattr(args, name, os.path.join(getattr(args, parent), foldername))
+
+def derive_args(args, **overrides):
+
+    # Copies the resolved args replacing a few values, like the style or the 
+    # output. Folders that were derived from the replaced ones, instead of 
+    # received explicitly, are derived again.
+
+    derived = copy.copy(args)
+
+    for name, value in overrides.items():
+        setattr(derived, name, value)
+    
+    for name, parent, foldername in DERIVED_FOLDERS:
+        if name not in overrides and getattr(args, name) == os.path.join(getattr(args, parent), foldername):
+            setattr(derived, name, os.path.join(getattr(derived, parent), foldername))
+    
+    return derived
+
+def create_parser():
 
     parser = argparse.ArgumentParser(
                         prog='mell',
@@ -136,6 +200,14 @@ def parse_args():
                         help="customize the value of individual properties in the metadata (before migrations)",
                         action='append')
 
+    parser.add_argument('--set-file',
+                        type=str,
+                        metavar='PATH',
+                        default=[],
+                        dest='set_file',
+                        help="apply the overrides inside a JSON file, before the ones in --set. It may contain an object mapping addresses to values, a JSON Patch (RFC 6902), or one of these per line",
+                        action='append')
+
     parser.add_argument('--do',
                         type=str,
                         metavar='NAME',
@@ -145,6 +217,22 @@ def parse_args():
                         help="define one or more action to be executed [nothing, statics, templates, generators]",
                         action='append')
 
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        metavar='N',
+                        default=1,
+                        dest='jobs',
+                        help="number of workers used to render templates and copy static files [1]",
+                        action='store')
+
+    parser.add_argument('--matrix',
+                        type=str,
+                        metavar='FILE',
+                        default=None,
+                        dest='matrix',
+                        help="json file listing styles, metadata, and output patterns to generate all their combinations in a single execution",
+                        action='store')
+
     parser.add_argument('--root',
                         type=str,
                         metavar='PATH',
@@ -217,6 +305,22 @@ def parse_args():
                         help="folder to generate the output files [<root>/output]",
                         action='store')
 
+    parser.add_argument('--output-archive',
+                        type=str,
+                        metavar='PATH',
+                        default=None,
+                        dest='output_archive',
+                        help="write the output files into an archive instead of the output folder (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz, or .zip)",
+                        action='store')
+
+    parser.add_argument('--cache',
+                        type=str,
+                        metavar='PATH',
+                        default=None,
+                        dest='cache',
+                        help="folder to store cached data between runs [<root>/.mell]",
+                        action='store')
+
     parser.add_argument('-M', '--show-metadata',
                         default=False,
                         dest='show_metadata',
@@ -266,6 +370,126 @@ def parse_args():
                         help="clean the output folder before generating the files",
                         action='store_true')
     
+    parser.add_argument('--prune',
+                        dest="prune",
+                        help="delete the output files produced by previous runs with --prune that are no longer produced, leaving the others in place",
+                        action='store_true')
+    
+    parser.add_argument('--sync',
+                        dest="sync",
+                        help="only copy the static files whose size or modification time differ from the ones in the output folder",
+                        action='store_true')
+    
+    parser.add_argument('--sync-hash',
+                        dest="sync_hash",
+                        help="like --sync, but comparing the content hash instead of the modification time",
+                        action='store_true')
+    
+    parser.add_argument('--only-changed',
+                        dest="only_changed",
+                        help="render the output files in memory and only rewrite the ones whose content changed",
+                        action='store_true')
+    
+    parser.add_argument('--incremental',
+                        dest="incremental",
+                        help="skip rendering the output files whose templates, metadata, and settings did not change since the last run",
+                        action='store_true')
+    
+    parser.add_argument('--bytecode-cache',
+                        dest="bytecode_cache",
+                        help="store the compiled templates inside the cache folder and reuse them in the next runs",
+                        action='store_true')
+    
+    parser.add_argument('--frozen',
+                        dest="frozen",
+                        help="assume the style does not change during the execution, skipping the up-to-date checks of loaded templates",
+                        action='store_true')
+    
+    parser.add_argument('--template-cache-size',
+                        type=int,
+                        metavar='N',
+                        default=400,
+                        dest='template_cache_size',
+                        help="number of compiled templates kept in memory, 0 disables it and -1 means unlimited [400]",
+                        action='store')
+    
+    parser.add_argument('--fragment-cache-size',
+                        type=int,
+                        metavar='N',
+                        default=1000,
+                        dest='fragment_cache_size',
+                        help="number of fragments rendered by the cache tag kept in memory, 0 disables it and -1 means unlimited [1000]",
+                        action='store')
+    
+    parser.add_argument('--fragment-cache',
+                        dest="fragment_cache",
+                        help="also store the fragments rendered by the cache tag inside the cache folder and reuse them in the next runs",
+                        action='store_true')
+    
+    parser.add_argument('--fragment-cache-limit',
+                        type=int,
+                        metavar='N',
+                        default=10000,
+                        dest='fragment_cache_limit',
+                        help="number of fragments kept on disk by --fragment-cache, the least recently used ones are removed [10000]",
+                        action='store')
+    
+    parser.add_argument('--watch',
+                        dest="watch",
+                        help="keep running after generating the files, regenerating the parts affected by changes in the style and metadata folders",
+                        action='store_true')
+    
+    parser.add_argument('--watch-interval',
+                        type=float,
+                        metavar='SECONDS',
+                        default=0.5,
+                        dest='watch_interval',
+                        help="interval used to poll the folders and to group related changes in watch mode [0.5]",
+                        action='store')
+    
+    parser.add_argument('--stream',
+                        dest="stream",
+                        help="write the output files while they are rendered, keeping the memory used flat for very large outputs. inflater.inflate then returns None for outputs written to a file, unless it receives return_text=True",
+                        action='store_true')
+    
+    parser.add_argument('--serve',
+                        type=str,
+                        metavar='SOCKET',
+                        default=None,
+                        dest='serve',
+                        help="keep running as a render server listening on this unix socket, receiving one JSON request per line. Uses --jobs workers",
+                        action='store')
+    
+    parser.add_argument('--trace',
+                        dest="trace",
+                        help="record the metadata paths read by each output and generator, so incremental runs only render the ones whose paths changed (implies --incremental)",
+                        action='store_true')
+    
+    parser.add_argument('--snapshot',
+                        dest="snapshot",
+                        help="store the metadata after applying --set and the migrations inside the cache folder, reusing it while the metadata files, --set values, and migrations do not change",
+                        action='store_true')
+    
+    parser.add_argument('--checkpoints',
+                        dest="checkpoints",
+                        help="store the metadata after each migration inside the cache folder and only execute the migrations from the first one that changed onward",
+                        action='store_true')
+    
+    parser.add_argument('--isolated-generators',
+                        dest="isolated_generators",
+                        help="execute the generators in parallel, using the number of workers in --jobs. Each one receives a read-only copy of the metadata",
+                        action='store_true')
+    
+    parser.add_argument('--profile',
+                        dest="profile",
+                        help="measure the wall and cpu time of each step, printing a summary and saving a Chrome trace to <cache>/profile.json",
+                        action='store_true')
+    
+    parser.add_argument('--profile-scripts',
+                        dest="profile_scripts",
+                        help="save a cProfile stats file for each generator and migration inside <cache>/profile",
+                        action='store_true')
+    
     parser.add_argument('--version',
                         action='version', 
                         version=f'{consts.name} {consts.version}')
@@ -318,38 +542,29 @@ def parse_args():
                         help="string representing the start of a comment block [#|]",
                         action='store')
 
-    args = parser.parse_args()
+    return parser
+
+def finish_args(args):
 
     if args.root is None:
         args.root = '.'
 
-    if args.output is None:
-        args.output = os.path.join(args.root, 'output')
-
-    if args.meta is None:
-        args.meta = os.path.join(args.root, 'meta')
-
-    if args.style is None:
-        args.style = os.path.join(args.root, 'style')
-
-    if args.statics is None:
-        args.statics = os.path.join(args.style, 'statics')
-
-    if args.templates is None:
-        args.templates = os.path.join(args.style, 'templates')
-
-    if args.generators is None:
-        args.generators = os.path.join(args.style, 'generators')
-
-    if args.assets is None:
-        args.assets = os.path.join(args.style, 'assets')
-
-    if args.migrations is None:
-        args.migrations = os.path.join(args.style, 'migrations')
+    resolve_folders(args)
 
     if args.do is None:
         args.do = ['statics', 'templates', 'generators']
 
+    if args.trace:
+        args.incremental = True
+    
+    if args.sync_hash:
+        args.sync = True
+    
+    set_log_level(args)
+    return args
+
+def set_log_level(args):
+
     global LOG_LEVEL
     
     if args.quiet and args.verbose:
@@ -361,6 +576,11 @@ def parse_args():
     elif args.verbose:
         LOG_LEVEL = 0
 
+def parse_args():
+
+    parser = create_parser()
+    args = finish_args(parser.parse_args())
+
     if args.new_root:
         run_new_root(args)
     
@@ -380,8 +600,15 @@ def parse_args():
     return args
 
 
-def load_metadata(args, meta_parameters):
+def load_metadata(args, meta_parameters, resolved=None, stack=()):
+
+    # Names are merged from left to right, each one resolved before with its 
+    # own parents. Each file is parsed and resolved once per run, copies are
+    # handed out as merging modifies them.
 
+    if resolved is None:
+        resolved = {}
+    
     meta = {}
 
     for metadata_names in meta_parameters:
@@ -389,22 +616,214 @@ def load_metadata(args, meta_parameters):
             if not metadata_name:
                 continue
 
-            filepath = os.path.join(args.meta, metadata_name) + ".json"
+            if metadata_name in stack:
+                error("Cyclic __parent__ reference in metadata:", ' -> '.join(stack + (metadata_name,)))
             
-            with open(filepath, "r") as fin:
-                meta_parent = json.loads(fin.read())
-                
-                if "__parent__" in meta_parent:
-                    meta_parent_2 = load_metadata(args, meta_parent["__parent__"].split())
-                    meta_parent = update_dict_recursively(meta_parent_2, meta_parent)
-                
-                meta = update_dict_recursively(meta, meta_parent)
+            if metadata_name not in resolved:
+                resolved[metadata_name] = load_metadata_file(args, metadata_name, resolved, stack)
+            
+            meta = update_dict_recursively(meta, copy_json(resolved[metadata_name]))
+    
+    return meta
+
+def load_metadata_file(args, metadata_name, resolved, stack):
+
+    folderpath = os.path.join(args.meta, metadata_name)
+
+    if os.path.isdir(folderpath):
+        meta = load_fragments(folderpath)
+    
+    else:
+        with open(folderpath + ".json", "r") as fin:
+            meta = json.loads(fin.read())
+    
+    if "__parent__" in meta:
+        meta_parent = load_metadata(args, meta["__parent__"].split(), resolved, stack + (metadata_name,))
+        meta = update_dict_recursively(meta_parent, meta)
+    
+    return meta
+
+def copy_json(value):
+
+    try:
+        return marshal.loads(marshal.dumps(value))
+    
+    except ValueError:
+
+        # Metadata holding lazy fragments can't be marshaled
+
+        if isinstance(value, LazyDict):
+            return value.copy()
+        elif isinstance(value, dict):
+            return {key: copy_json(x) for key, x in value.items()}
+        elif isinstance(value, list):
+            return [copy_json(x) for x in value]
+        else:
+            return value
+
+def load_fragments(folderpath):
+
+    # A metadata folder holds one json file per property, named after it, and 
+    # one subfolder per property that is itself split in fragments.
+
+    meta = LazyDict()
+
+    for entry in sorted(os.scandir(folderpath), key=lambda x: x.name):
+        if entry.name.startswith('.'):
+            continue
+
+        if entry.is_dir():
+            fragment = MetaFragment(entry.path)
+            key = entry.name
+        elif entry.name.endswith('.json'):
+            fragment = MetaFragment(entry.path)
+            key = entry.name[:-5]
+        else:
+            continue
+
+        if key in meta:
+            fragment = MergedFragment(dict.__getitem__(meta, key), fragment)
+        
+        dict.__setitem__(meta, key, fragment)
     
     return meta
 
+
+class MetaFragment:
+
+    # A metadata property that is only read from its file, or folder, when 
+    # accessed for the first time. The parsed value is kept and every access 
+    # receives its own copy.
+
+    def __init__(self, path):
+        self.path = path
+        self.loaded = False
+        self.value = None
+    
+    def load(self):
+
+        if not self.loaded:
+            debug("  Loading metadata fragment", self.path)
+            
+            if os.path.isdir(self.path):
+                self.value = load_fragments(self.path)
+            else:
+                with open(self.path, "r") as fin:
+                    self.value = json.loads(fin.read())
+            
+            self.loaded = True
+        
+        return copy_json(self.value)
+
+
+class MergedFragment(MetaFragment):
+
+    # A property defined on both sides of a merge involving lazy metadata
+
+    def __init__(self, dst, src):
+        self.dst = dst
+        self.src = src
+    
+    def load(self):
+        return update_dict_recursively(load_fragment(self.dst), load_fragment(self.src))
+
+
+def load_fragment(value):
+
+    # Plain values are copied too, as the merge happens in place and the same 
+    # fragment is shared by every copy of the metadata
+
+    return value.load() if isinstance(value, MetaFragment) else copy_json(value)
+
+
+class LazyDict(dict):
+
+    # A dict whose values may be fragments that are loaded on first access. 
+    # Methods that expose values load them first, so fragments never leak.
+
+    def _load(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, MetaFragment):
+            value = value.load()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def load_all(self):
+        for key in dict.keys(self):
+            self._load(key)
+        return self
+
+    def __getitem__(self, key):
+        return self._load(key)
+    
+    def __iter__(self):
+        # Being different from dict's makes dict(x) and {**x} use __getitem__
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self._load(key) if key in self else default
+    
+    def setdefault(self, key, default=None):
+        return self._load(key) if key in self else dict.setdefault(self, key, default)
+    
+    def pop(self, key, *default):
+        if key in self:
+            self._load(key)
+        return dict.pop(self, key, *default)
+    
+    def popitem(self):
+        self.load_all()
+        return dict.popitem(self)
+    
+    def items(self):
+        return dict.items(self.load_all())
+
+    def values(self):
+        return dict.values(self.load_all())
+    
+    def copy(self):
+        return LazyDict((key, value if isinstance(value, MetaFragment) else copy_json(value)) for key, value in dict.items(self))
+    
+    def __eq__(self, other):
+        if isinstance(other, LazyDict):
+            other.load_all()
+        return dict.__eq__(self.load_all(), other)
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    def __repr__(self):
+        return dict.__repr__(self.load_all())
+
+    __hash__ = None
+
+
+def merge_lazy_dicts(dst, src):
+
+    # Merges without loading fragments, properties defined on both sides 
+    # become a fragment that merges them when loaded.
+
+    merged = LazyDict(dict.items(dst))
+
+    for key, value in dict.items(src):
+        if key not in merged:
+            dict.__setitem__(merged, key, value)
+        else:
+            current = dict.__getitem__(merged, key)
+            if isinstance(current, MetaFragment) or isinstance(value, MetaFragment):
+                dict.__setitem__(merged, key, MergedFragment(current, value))
+            else:
+                dict.__setitem__(merged, key, update_dict_recursively(current, value))
+    
+    return merged
+
+
 def update_dict_recursively(dst, src):
 
-    if isinstance(dst, dict):
+    if isinstance(dst, dict) and isinstance(src, dict) and (isinstance(dst, LazyDict) or isinstance(src, LazyDict)):
+        dst = merge_lazy_dicts(dst, src)
+
+    elif isinstance(dst, dict):
         for key, value in src.items():
             if key in dst:
                 dst[key] = update_dict_recursively(dst[key], value)
@@ -424,227 +843,1885 @@ def update_dict_recursively(dst, src):
 
 class MetaIterator:
 
-    def __init__(self, iterator, is_dict=False):
+    __slots__ = ('iterator', 'parent', 'is_dict', 'index')
+
+    def __init__(self, iterator, parent, is_dict=False):
         self.iterator = iterator
+        self.parent = parent
         self.is_dict = is_dict
+        self.index = 0
+    
+    def __iter__(self):
+        return self
     
     def __next__(self):
         value = self.iterator.__next__()
         if self.is_dict:
-            return value[0], Meta(value[1])
+            return value[0], meta_child(self.parent, value[0], value[1])
         else:
-            return Meta(value)
+            self.index += 1
+            return meta_child(self.parent, self.index - 1, value)
 
 
 class Meta:
 
-    def __init__(self, value):
-        self.__dict__['value'] = value
+    # The wrapped value, the parent Meta, the key inside the parent, and the 
+    # cached child wrappers are stored with prefixed names, as any attribute of 
+    # the class hides the metadata property with the same name. The parent and 
+    # key are only used to trace which metadata paths were accessed. 
+    # 
+    # Metadata properties are resolved in __getattribute__, as going through 
+    # __getattr__ costs a failed lookup, and its AttributeError, per access.
+
+    __slots__ = ('_meta_value', '_meta_parent', '_meta_key', '_meta_children')
+
+    def __init__(self, value, parent=None, key=None):
+        set_meta_value(self, value)
+        set_meta_parent(self, parent)
+        set_meta_key(self, key)
+        set_meta_children(self, None)
+    
+    @property
+    def value(self):
+
+        if TRACER is not None:
+            TRACER.record(self, 'value')
+        return get_meta_value(self)
     
     def __iter__(self):
 
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
             raise IndexError("Trying to iterate over a metadata that does not exist.")
         if isinstance(v, dict):
-            return MetaIterator(v.items().__iter__(), is_dict=True)
+            if TRACER is not None:
+                TRACER.record(self, 'keys')
+            return MetaIterator(v.items().__iter__(), self, is_dict=True)
         else:
-            return MetaIterator(v.__iter__())
+            if TRACER is not None:
+                TRACER.record(self, 'len' if isinstance(v, list) else 'value')
+            return MetaIterator(v.__iter__(), self)
     
     def __contains__(self, index):
         
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
             raise IndexError("Trying to check membership in a metadata that does not exist.")
+        if TRACER is not None:
+            if isinstance(v, dict):
+                TRACER.record(self, 'has', index)
+            else:
+                TRACER.record(self, 'value')
         return index in v
     
     def __eq__(self, other):
 
+        if TRACER is not None:
+            TRACER.record(self, 'value')
         if isinstance(other, Meta):
-            return self.value == other.value
+            return get_meta_value(self) == other.value
         else:
-            return self.value == other
+            return get_meta_value(self) == other
     
     def __bool__(self):
 
-        return True if self.value else False
+        if TRACER is not None:
+            TRACER.record(self, 'bool')
+        return True if get_meta_value(self) else False
 
-    def __getattr__(self, index):
+    def __getattribute__(self, index):
 
-        v = self.value
+        if index in META_ATTRIBUTES:
+            return object_getattribute(self, index)
+        
+        v = get_meta_value(self)
         if v is None:
-            return Meta(None)
+            return MISSING
         elif index in v:
             child_value = v[index]
-            return Meta(child_value) if isinstance(child_value, (list, dict)) else child_value
+            if isinstance(child_value, (list, dict)):
+                return meta_child(self, index, child_value)
+            if TRACER is not None:
+                TRACER.record(self, 'value', index)
+            return child_value
         else:
-            return Meta(None)
+            if TRACER is not None:
+                TRACER.record(self, 'has', index)
+            return MISSING
     
     def __getitem__(self, index):
         
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
-            return Meta(None)
+            return MISSING
+        elif isinstance(index, (str, int)):
+            try:
+                child_value = v[index]
+            except LookupError:
+                # Jinja turns the error into an undefined value, which still 
+                # depends on the index becoming available
+                if TRACER is not None:
+                    if isinstance(v, list):
+                        TRACER.record(self, 'len')
+                    else:
+                        TRACER.record(self, 'has', index)
+                raise
+            return meta_child(self, index, child_value)
         else:
-            return Meta(v[index])
+            return Meta(v[index], self, index)
     
     def __setitem__(self, index, value):
         
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
             raise IndexError("Trying to set an attribute to a metadata that does not exist.")
+        if READONLY_META:
+            raise TypeError("The metadata is read-only inside isolated generators.")
         v[index] = value
     
     def __setattr__(self, index, value):
         
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
             raise IndexError("Trying to set an attribute to a metadata that does not exist.")
+        if READONLY_META:
+            raise TypeError("The metadata is read-only inside isolated generators.")
         v[index] = value
     
     def __len__(self):
         
-        v = self.value
+        v = get_meta_value(self)
         if v is None:
             raise IndexError("Trying to get the length of a metadata that does not exist.")
+        if TRACER is not None:
+            TRACER.record(self, 'len')
         return len(v)
 
     def __repr__(self):
         
-        v = self.value
-        return repr(v)
+        if TRACER is not None:
+            TRACER.record(self, 'value')
+        return repr(get_meta_value(self))
 
     def __str__(self) -> str:
 
-        v = self.value
-        return str(v)
+        if TRACER is not None:
+            TRACER.record(self, 'value')
+        return str(get_meta_value(self))
 
 
-class Inflater:
-
-    def __init__(self, args):
-        self.args = args
-        self.template_env = self._create_env(args.templates)
-        self.asset_env = self._create_env(args.assets)
-    
-    def _create_env(self, folderpath):
-        if not os.path.exists(folderpath):
-            return None
+# Meta overrides __getattribute__ and __setattr__, so its slots are accessed 
+# through their descriptors
 
-        return Environment(
-            block_start_string=self.args.block_start,
-            block_end_string=self.args.block_end,
-            
-            variable_start_string=self.args.variable_start, 
-            variable_end_string=self.args.variable_end,
-            
-            comment_start_string=self.args.comment_start,  
-            comment_end_string=self.args.comment_end,
+META_ATTRIBUTES = frozenset(dir(Meta))
 
-            loader=FileSystemLoader(folderpath),
-            autoescape=select_autoescape(),
-            trim_blocks=True, 
-            lstrip_blocks=True
-        )
-    
-    def inflate(self, relpath, meta, to_file=None, from_asset=True):
-        
-        if from_asset:
-            if self.asset_env is None:
-                raise IOError("Missing asset folder")
-            template = self.asset_env.get_template(relpath)
-        
-        else:
-            if self.template_env is None:
-                raise IOError("Missing template folder")
-            template = self.template_env.get_template(relpath)
-        
-        text = template.render(args=self.args, meta=meta, inflater=self)
+object_getattribute = object.__getattribute__
+get_meta_value = Meta._meta_value.__get__
+get_meta_children = Meta._meta_children.__get__
+set_meta_value = Meta._meta_value.__set__
+set_meta_parent = Meta._meta_parent.__set__
+set_meta_key = Meta._meta_key.__set__
+set_meta_children = Meta._meta_children.__set__
 
-        if to_file is not None:
+# Shared by every lookup of something that does not exist. It can't be 
+# modified, as setting anything on a Meta without value raises an error.
 
-            filepath_out = os.path.join(self.args.output, to_file)
-            folderpath_out = os.path.dirname(filepath_out)
-            
-            os.makedirs(folderpath_out, exist_ok=True)
-            
-            with open(filepath_out, "w") as fout:
-                fout.write(text)
+MISSING = Meta(None)
 
-        return text
-        
-def do_action_nothing(args, inflater, meta):
-    pass
+def meta_child(parent, key, value):
 
-def do_clean(args):
+    # Wrappers are cached per parent and reused while the parent still holds 
+    # the same object under that key.
 
-    if not args.clean:
-        return
+    children = get_meta_children(parent)
 
-    info("Cleaning output directory")
+    if children is None:
+        children = {}
+        set_meta_children(parent, children)
 
-    if os.path.exists(args.output):
-        if os.path.isdir(args.output):
-            for filepath in glob.glob(os.path.join(args.output, '*')):
-                debug("  Removing:", filepath)
-                if os.path.isdir(filepath):
-                    shutil.rmtree(filepath)
-                else:
-                    os.remove(filepath)
-        else:
-            os.remove(args.output)
+    else:
+        child = children.get(key)
+        if child is not None and get_meta_value(child) is value:
+            return child
     
-def do_action_statics(args, inflater, meta):
-
-    info("Copying static data")
+    child = Meta(value, parent, key)
+    children[key] = child
+    return child
 
-    for filepath in glob.glob(os.path.join(args.statics, '**'), recursive=True):
-        if os.path.isfile(filepath):
-            relpath = os.path.relpath(filepath, args.statics)
-            filepath_out = os.path.join(args.output, relpath)
-            debug(f"{filepath} -> {filepath_out}")
+def unwrap(meta):
+    return meta._meta_value if isinstance(meta, Meta) else meta
 
-            folderpath_out = os.path.dirname(filepath_out)
-            os.makedirs(folderpath_out, exist_ok=True)
-            shutil.copy2(filepath, filepath_out)
+def meta_root(meta):
 
-def do_action_templates(args, inflater:Inflater, meta:Meta):
+    while meta._meta_parent is not None:
+        meta = meta._meta_parent
+    
+    return meta
 
-    info("Generating template based files")
+def meta_path(meta):
 
-    for filepath in glob.glob(os.path.join(args.templates, "**"), recursive=True):
-        if os.path.isfile(filepath):
-            relpath = os.path.relpath(filepath, args.templates)
-            debug("  ", relpath)
+    path = []
 
-            inflater.inflate(relpath, meta, to_file=relpath, from_asset=False)
+    while meta._meta_parent is not None:
+        path.append(meta._meta_key)
+        meta = meta._meta_parent
+    
+    path.reverse()
+    return path
 
+def evaluate_access(value, kind, path):
 
-def do_action_generators(args, inflater, meta):
+    # Summarizes what a template could observe from the metadata at path with 
+    # the given kind of access. Raises LookupError or TypeError if the path 
+    # does not exist anymore.
     
-    info("Executing generator files")
+    for key in path[:-1] if kind == 'has' else path:
+        value = value[key]
+    
+    if kind == 'has':
+        return path[-1] in value
+    elif kind == 'keys':
+        return digest_json(list(value.keys()))
+    elif kind == 'len':
+        return len(value)
+    elif kind == 'bool':
+        return bool(value)
+    else:
+        return digest_json(value)
 
-    rootpath = os.path.dirname(args.generators)
 
-    for filepath in glob.glob(os.path.join(args.generators, '*.py'), recursive=True):
-        if os.path.isfile(filepath):
-            generator_name = os.path.relpath(filepath, rootpath).replace('\\', '.').replace('/', '.')
-            debug("  ", filepath)
-            
-            generator_spec = importlib.util.spec_from_file_location(generator_name, filepath)
-            generator = importlib.util.module_from_spec(generator_spec)
-            generator_spec.loader.exec_module(generator)
-            generator.generate(args, meta, inflater)
+class Tracer:
 
-def get_sorted_script_files(folderpath):
+    # Records the metadata paths accessed while rendering an output or running 
+    # a generator. Paths are relative to the root Meta being traced, accesses 
+    # through Metas of another root make the trace unusable.
 
-    filepaths = []
+    def __init__(self, root):
+        self.root = root
+        self.accesses = {}
+        self.valid = isinstance(root, Meta)
+    
+    def record(self, meta, kind, key=None):
 
-    for filepath in glob.glob(os.path.join(folderpath, '*.py'), recursive=True):
-        if os.path.isfile(filepath):
-            filename = os.path.basename(filepath)
-            cells = filename.split('.', 1)
-            if len(cells) == 2:
+        if not self.valid or (meta._meta_value is None and meta._meta_parent is None):
+            return
+        
+        if meta_root(meta) is not self.root:
+            self.valid = False
+            return
+        
+        path = meta_path(meta)
+
+        if key is not None:
+            path.append(key)
+        
+        if not all(isinstance(x, (str, int)) for x in path):
+            self.valid = False
+            return
+        
+        access = (tuple(path), kind)
+
+        if access not in self.accesses:
+            self.accesses[access] = evaluate_access(meta_root(meta)._meta_value, kind, path)
+
+    def extend(self, root, deps):
+        
+        if root is not self.root:
+            self.valid = False
+        elif self.valid:
+            for path, kind, observed in deps:
+                self.accesses.setdefault((tuple(path), kind), observed)
+    
+    def deps(self):
+        return [[list(path), kind, observed] for (path, kind), observed in self.accesses.items()]
+
+
+def are_deps_unchanged(root, deps):
+
+    value = root._meta_value
+
+    for path, kind, observed in deps:
+        try:
+            if evaluate_access(value, kind, path) != observed:
+                return False
+        except (LookupError, TypeError):
+            return False
+    
+    return True
+
+def extend_tracer(meta, entry):
+
+    # Adds the dependencies of an output that was not rendered again
+
+    if 'deps' in entry and isinstance(meta, Meta):
+        TRACER.extend(meta_root(meta), entry['deps'])
+    else:
+        TRACER.valid = False
+
+def push_tracer(root):
+
+    global TRACER
+
+    parent = TRACER
+    TRACER = Tracer(root)
+    return parent
+
+def pop_tracer(parent):
+
+    # Outputs rendered inside another one, like a partial, are also part of 
+    # what the outer one depends on.
+
+    global TRACER
+
+    tracer = TRACER
+    TRACER = parent
+
+    if parent is not None:
+        if tracer.valid:
+            parent.extend(tracer.root, tracer.deps())
+        else:
+            parent.valid = False
+    
+    return tracer
+
+
+class Span:
+
+    __slots__ = ('profiler', 'category', 'name', 'start', 'cpu_start')
+
+    def __init__(self, profiler, category, name):
+        self.profiler = profiler
+        self.category = category
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.events.append({
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': self.start * 1e6,
+            'dur': (time.perf_counter() - self.start) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {'cpu_ms': (time.thread_time() - self.cpu_start) * 1e3}
+        })
+
+
+class NoSpan:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        pass
+
+
+NO_SPAN = NoSpan()
+
+class Profiler:
+
+    # Records wall and cpu time of each step as Chrome trace events, which can 
+    # be opened in chrome://tracing or ui.perfetto.dev
+
+    def __init__(self):
+        self.events = []
+    
+    def span(self, category, name):
+        return Span(self, category, name)
+    
+    def collect(self):
+        events = self.events
+        self.events = []
+        return events
+    
+    def save(self, filepath):
+
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+
+        with open(filepath, 'w') as fout:
+            fout.write(json.dumps({'traceEvents': self.events, 'displayTimeUnit': 'ms'}))
+    
+    def summary(self):
+
+        categories = {}
+
+        for event in self.events:
+            stats = categories.setdefault(event['cat'], [0, 0.0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += event['dur'] / 1e3
+            stats[2] += event['args']['cpu_ms']
+            stats[3] = max(stats[3], event['dur'] / 1e3)
+        
+        lines = [f"{'Step':<16} {'Count':>7} {'Wall (ms)':>12} {'CPU (ms)':>12} {'Max (ms)':>12}"]
+
+        for category, (count, wall, cpu, longest) in sorted(categories.items(), key=lambda x: -x[1][1]):
+            lines.append(f"{category:<16} {count:>7} {wall:>12.2f} {cpu:>12.2f} {longest:>12.2f}")
+        
+        lines.append('')
+        lines.append('Slowest:')
+
+        for event in sorted(self.events, key=lambda x: -x['dur'])[:10]:
+            lines.append(f"  {event['dur'] / 1e3:>10.2f} ms  {event['cat']}: {event['name']}")
+        
+        return '\n'.join(lines)
+
+def profile(category, name):
+    return NO_SPAN if PROFILER is None else PROFILER.span(category, name)
+
+def run_profiled(args, name, function, *params):
+
+    # Optionally stores a pstats file for each generator and migration script
+
+    if not args.profile_scripts:
+        return function(*params)
+    
+    import cProfile
+
+    profiler = cProfile.Profile()
+
+    try:
+        return profiler.runcall(function, *params)
+    finally:
+        folderpath = os.path.join(args.cache, 'profile')
+        os.makedirs(folderpath, exist_ok=True)
+        profiler.dump_stats(os.path.join(folderpath, name + '.pstats'))
+
+
+MANIFEST_FILENAME = '.mell-manifest.json'
+
+def digest_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def digest_json(value):
+    value = unwrap(value)
+    return digest_text(json.dumps(value, sort_keys=True, separators=(',', ':'), default=str))
+
+def digest_file(filepath):
+    hasher = hashlib.sha1()
+    with open(filepath, 'rb') as fin:
+        for chunk in iter(lambda: fin.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def digest_folder(folderpath, relpaths=None):
+    hasher = hashlib.sha1()
+    for relpath in walk_folder(folderpath) if relpaths is None else relpaths:
+        hasher.update(relpath.encode('utf-8'))
+        hasher.update(digest_file(os.path.join(folderpath, relpath)).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+IGNORE_FILENAME = '.mellignore'
+
+# Files found inside each style folder, shared by every action in this run
+
+SCANS = {}
+
+def walk_folder(folderpath, is_ignored=None):
+
+    # Lists the files inside folderpath, relative to it and sorted. Hidden files 
+    # and folders are skipped, like glob does, and ignored folders are not 
+    # entered at all.
+
+    relpaths = []
+    pending = ['']
+
+    while pending:
+        prefix = pending.pop()
+
+        try:
+            entries = os.scandir(os.path.join(folderpath, prefix) if prefix else folderpath)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                
+                relpath = prefix + entry.name
+                is_dir = entry.is_dir()
+
+                if is_ignored is not None and is_ignored(relpath, entry.name, is_dir):
+                    continue
+
+                if is_dir:
+                    pending.append(relpath + os.sep)
+                elif entry.is_file():
+                    relpaths.append(relpath)
+    
+    relpaths.sort()
+    return relpaths
+
+def load_ignore_rules(args):
+
+    # Each line of <style>/.mellignore is a glob pattern. Patterns without a 
+    # slash match the name of any file or folder, the others match the path 
+    # relative to the style folder, like statics/vendor. A trailing slash 
+    # matches only folders.
+
+    try:
+        with open(os.path.join(args.style, IGNORE_FILENAME), 'r') as fin:
+            lines = fin.read().splitlines()
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    
+    import fnmatch
+
+    rules = []
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        folders_only = line.endswith('/')
+        pattern = line.strip('/')
+        regex = re.compile(fnmatch.translate(pattern))
+        rules.append((regex, '/' in pattern, folders_only))
+    
+    return rules
+
+def scan_folder(args, folderpath):
+
+    key = (args.style, folderpath)
+
+    if key not in SCANS:
+        rules = load_ignore_rules(args)
+        
+        if rules:
+            prefix = os.path.relpath(folderpath, args.style).replace(os.sep, '/') + '/'
+
+            def is_ignored(relpath, name, is_dir):
+                path = prefix + relpath.replace(os.sep, '/')
+                for regex, match_path, folders_only in rules:
+                    if (is_dir or not folders_only) and regex.match(path if match_path else name):
+                        return True
+                return False
+            
+            SCANS[key] = walk_folder(folderpath, is_ignored)
+        
+        else:
+            SCANS[key] = walk_folder(folderpath)
+    
+    return SCANS[key]
+
+
+class Manifest:
+
+    def __init__(self, args, settings):
+        self.filepath = os.path.join(args.output, MANIFEST_FILENAME)
+        self.settings = settings
+        self.previous = {'outputs': {}, 'generators': {}, 'sources': {}}
+        self.current = {'outputs': {}, 'generators': {}, 'sources': {}}
+        self._load()
+    
+    def _load(self):
+
+        if not os.path.isfile(self.filepath):
+            info("Manifest not found, performing a full rebuild")
+            return
+        
+        try:
+            with open(self.filepath, 'r') as fin:
+                data = json.loads(fin.read())
+        except (OSError, ValueError):
+            warn("Ignoring unreadable manifest", self.filepath)
+            return
+        
+        if data.get('version') != consts.version or data.get('settings') != self.settings:
+            info("Manifest is stale, performing a full rebuild")
+            return
+
+        for key in self.previous:
+            self.previous[key] = data.get(key, {})
+    
+    def get(self, section, key):
+        return self.previous[section].get(key)
+
+    def set(self, section, key, value):
+        self.current[section][key] = value
+    
+    def save(self):
+        
+        data = {
+            'version': consts.version, 
+            'settings': self.settings
+        }
+
+        for key in self.previous:
+            data[key] = {**self.previous[key], **self.current[key]}
+
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        tmp_filepath = self.filepath + '.tmp'
+
+        with open(tmp_filepath, 'w') as fout:
+            fout.write(json.dumps(data))
+        
+        os.replace(tmp_filepath, self.filepath)
+
+        self.previous = {key: data[key] for key in self.previous}
+        self.current = {key: {} for key in self.current}
+
+
+FRAGMENT_EXTENSION = None
+
+class FragmentCache:
+
+    # Fragments rendered by the cache tag, kept in a bounded LRU and, when a 
+    # folder is given, also on disk so they survive across runs.
+
+    def __init__(self, maxsize, folderpath=None):
+        self.maxsize = maxsize
+        self.folderpath = folderpath
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _filepath(self, key):
+        return os.path.join(self.folderpath, key[:2], key)
+
+    def get(self, key):
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        
+        if self.folderpath is not None:
+            try:
+                with open(self._filepath(key), 'r') as fin:
+                    text = fin.read()
+            except FileNotFoundError:
+                pass
+            else:
+                # The modification time orders the fragments evicted by prune
+                os.utime(self._filepath(key))
+                self._remember(key, text)
+                with self.lock:
+                    self.hits += 1
+                return text
+        
+        with self.lock:
+            self.misses += 1
+        
+        return None
+    
+    def put(self, key, text):
+
+        self._remember(key, text)
+
+        if self.folderpath is not None:
+            filepath = self._filepath(key)
+            tmp_filepath = f'{filepath}.{os.getpid()}.{threading.get_ident()}.tmp'
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+            with open(tmp_filepath, 'w') as fout:
+                fout.write(text)
+            
+            os.replace(tmp_filepath, filepath)
+    
+    def _remember(self, key, text):
+
+        if self.maxsize == 0:
+            return
+        
+        with self.lock:
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+
+            while self.maxsize > 0 and len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+    
+    def collect(self):
+        with self.lock:
+            stats = (self.hits, self.misses)
+            self.hits = 0
+            self.misses = 0
+        return stats
+    
+    def merge(self, stats):
+        with self.lock:
+            self.hits += stats[0]
+            self.misses += stats[1]
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+def prune_fragments(folderpath, limit):
+
+    # Removes the least recently used fragments stored on disk, of every 
+    # version and setting, until at most limit remain
+
+    fragments = []
+
+    for dirpath, _, filenames in os.walk(folderpath):
+        for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            try:
+                fragments.append((os.stat(filepath).st_mtime_ns, filepath))
+            except FileNotFoundError:
+                pass
+    
+    if len(fragments) <= limit:
+        return 0
+    
+    fragments.sort()
+
+    for _, filepath in fragments[:len(fragments) - limit]:
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+    
+    return len(fragments) - limit
+
+def get_fragment_extension():
+
+    # Created on first use, as jinja is only imported when rendering. Usage:
+    # |? cache "user", meta.users[i] ?| ... |? endcache ?|
+    # The fragment is keyed by its source, the templates it may use, the 
+    # explicit key and the contents of the metadata given after it, which must 
+    # include all it reads.
+
+    global FRAGMENT_EXTENSION
+
+    if FRAGMENT_EXTENSION is not None:
+        return FRAGMENT_EXTENSION
+    
+    from jinja2 import nodes
+    from jinja2.ext import Extension
+    from markupsafe import Markup
+
+    class FragmentExtension(Extension):
+
+        tags = {'cache'}
+
+        def __init__(self, environment):
+            super().__init__(environment)
+            environment.extend(fragment_cache=None)
+        
+        def parse(self, parser):
+
+            lineno = next(parser.stream).lineno
+            values = [parser.parse_expression()]
+
+            while parser.stream.skip_if('comma'):
+                values.append(parser.parse_expression())
+            
+            body = parser.parse_statements(('name:endcache',), drop_needle=True)
+            source = nodes.Const(digest_text(repr(body)))
+            call = self.call_method('_render', [nodes.List(values), source, nodes.ContextReference()])
+
+            return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+        
+        def _render(self, values, source, context, caller):
+
+            cache = self.environment.fragment_cache
+            inflater = context.get('inflater')
+            autoescape = context.eval_ctx.autoescape
+
+            if cache is None:
+                return caller()
+            
+            # The block may use templates included or imported by the one holding 
+            # it, so they are part of the key too
+
+            references = None
+
+            if isinstance(inflater, Inflater) and context.name is not None:
+                references = inflater.references_digest(context.name, self.environment.fragment_from_asset)
+
+            for value in values[1:]:
+                if TRACER is not None and isinstance(value, Meta):
+                    TRACER.record(value, 'value')
+            
+            key = digest_json([source, references, autoescape, *[unwrap(x) for x in values]])
+            text = cache.get(key)
+
+            if text is None:
+                text = str(caller())
+                cache.put(key, text)
+            
+            return Markup(text) if autoescape else text
+    
+    FRAGMENT_EXTENSION = FragmentExtension
+    return FRAGMENT_EXTENSION
+
+
+class Inflater:
+
+    def __init__(self, args, manifest=None):
+        self.args = args
+        self.bytecode_cache = None
+        self.envs = {}
+        self.produced = []
+        self.rewritten = 0
+        self.unchanged = 0
+
+        if manifest is None and args.incremental:
+            manifest = Manifest(args, self._settings_digest())
+        
+        self.manifest = manifest
+        self.meta_digest_hint = None
+        self.archive = None
+        self.fragment_cache = FragmentCache(args.fragment_cache_size)
+        self.inflated = {}
+        self._nested = []
+        self._template_digests = {}
+        self._folder_digests = {}
+    
+    def _create_env(self, folderpath, from_asset):
+        if not os.path.exists(folderpath):
+            return None
+        
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+        if self.bytecode_cache is None:
+            self.bytecode_cache = self._create_bytecode_cache()
+        
+        if self.args.fragment_cache and self.fragment_cache.folderpath is None:
+            self.fragment_cache.folderpath = self._fragment_cache_folder()
+
+        env = Environment(
+            block_start_string=self.args.block_start,
+            block_end_string=self.args.block_end,
+            
+            variable_start_string=self.args.variable_start, 
+            variable_end_string=self.args.variable_end,
+            
+            comment_start_string=self.args.comment_start,  
+            comment_end_string=self.args.comment_end,
+
+            loader=FileSystemLoader(folderpath),
+            autoescape=select_autoescape(),
+            trim_blocks=True, 
+            lstrip_blocks=True,
+
+            bytecode_cache=self.bytecode_cache,
+            auto_reload=not self.args.frozen,
+            cache_size=self.args.template_cache_size,
+            extensions=[get_fragment_extension()]
+        )
+
+        env.fragment_cache = self.fragment_cache
+        env.fragment_from_asset = from_asset
+        return env
+    
+    def _fragment_cache_folder(self):
+
+        import jinja2
+
+        # Fragments rendered by another version of mell or jinja are not reused
+        
+        key = digest_text(self._settings_digest() + consts.version + jinja2.__version__)
+        return os.path.join(self.args.cache, 'fragments', key)
+    
+    def _create_bytecode_cache(self):
+        if not self.args.bytecode_cache:
+            return None
+        
+        import jinja2
+
+        # Jinja keys its bytecode by template name and source only, so a folder 
+        # is used per combination of delimiters and jinja version.
+        
+        key = digest_text(self._settings_digest() + jinja2.__version__)
+        folderpath = os.path.join(self.args.cache, 'bytecode', key)
+        os.makedirs(folderpath, exist_ok=True)
+
+        return jinja2.FileSystemBytecodeCache(folderpath)
+    
+    def _settings_digest(self):
+        a = self.args
+        return digest_json([a.block_start, a.block_end, a.variable_start, a.variable_end, a.comment_start, a.comment_end])
+
+    def rebind(self, args):
+
+        # Reuses the environments, and their compiled templates, in another run 
+        # of the same style, like one with a different metadata or output.
+
+        self.args = args
+        self.produced = []
+        self.rewritten = 0
+        self.unchanged = 0
+        self.manifest = Manifest(args, self._settings_digest()) if args.incremental else None
+
+        # The style may have changed since the last run, the digests and folder 
+        # listings are cheap to compute again, compared with a render
+
+        self._clear_digests()
+    
+    def fork(self, args):
+
+        # Another inflater sharing the environments, and their compiled templates, 
+        # with its own state, for requests rendered concurrently.
+
+        inflater = copy.copy(self)
+        inflater.args = args
+        inflater.produced = []
+        inflater.rewritten = 0
+        inflater.unchanged = 0
+        inflater.manifest = None
+        inflater.archive = None
+        inflater.meta_digest_hint = None
+        inflater.inflated = {}
+        inflater._nested = []
+        return inflater
+    
+    def collect(self):
+
+        # Returns and resets what this inflater produced, so a worker process 
+        # can hand it back to the main inflater.
+
+        report = {
+            'produced': self.produced,
+            'rewritten': self.rewritten,
+            'unchanged': self.unchanged,
+            'manifest': self.manifest.current if self.manifest is not None else None,
+            'events': PROFILER.collect() if PROFILER is not None else [],
+            'files': self.archive.collect() if self.archive is not None else [],
+            'fragments': self.fragment_cache.collect(),
+            'inflated': self.inflated
+        }
+
+        self.produced = []
+        self.rewritten = 0
+        self.unchanged = 0
+
+        if self.manifest is not None:
+            self.manifest.current = {key: {} for key in self.manifest.current}
+        
+        return report
+    
+    def merge(self, report):
+        
+        self.produced.extend(report['produced'])
+        self.rewritten += report['rewritten']
+        self.unchanged += report['unchanged']
+
+        if PROFILER is not None:
+            PROFILER.events.extend(report['events'])
+        
+        for relpath, data in report['files']:
+            self.archive.add(relpath, data)
+        
+        self.fragment_cache.merge(report['fragments'])
+        self.inflated.update(report['inflated'])
+
+        if self.manifest is not None:
+            for section, entries in report['manifest'].items():
+                self.manifest.current[section].update(entries)
+    
+    def _get_env(self, from_asset):
+
+        # The environments are created on first use, as most runs only need one 
+        # of them, or none.
+
+        if from_asset not in self.envs:
+            self.envs[from_asset] = self._create_env(self.args.assets if from_asset else self.args.templates, from_asset)
+        
+        env = self.envs[from_asset]
+
+        if env is None:
+            raise IOError("Missing asset folder" if from_asset else "Missing template folder")
+        
+        return env
+    
+    def folder_digest(self, folderpath):
+
+        if folderpath not in self._folder_digests:
+            self._folder_digests[folderpath] = digest_folder(folderpath, scan_folder(self.args, folderpath))
+        
+        return self._folder_digests[folderpath]
+
+    def template_sources(self, relpath, from_asset=True):
+
+        # Lists the template itself and everything it extends, includes, or imports
+        # as (name, source digest) pairs. Dynamic references can't be resolved and 
+        # are listed as (None, None).
+
+        import jinja2.meta
+
+        prefix = 'assets' if from_asset else 'templates'
+        env = self._get_env(from_asset)
+        sources = []
+        pending = [relpath]
+        visited = set()
+
+        while pending:
+            name = pending.pop()
+            if name in visited:
+                continue
+            visited.add(name)
+
+            try:
+                source, _, _ = env.loader.get_source(env, name)
+            except jinja2.TemplateNotFound:
+                sources.append((name, 'missing'))
+                continue
+
+            source_digest = digest_text(source)
+            source_key = prefix + ':' + name
+            entry = self.manifest.get('sources', source_key) if self.manifest else None
+
+            if entry is None or entry['digest'] != source_digest:
+                deps = list(jinja2.meta.find_referenced_templates(env.parse(source)))
+                entry = {'digest': source_digest, 'deps': deps}
+            
+            if self.manifest:
+                self.manifest.set('sources', source_key, entry)
+            
+            sources.append((name, source_digest))
+
+            for dep in entry['deps']:
+                if dep is None:
+                    sources.append((None, None))
+                else:
+                    pending.append(dep)
+        
+        return sources
+
+    def template_digest(self, relpath, from_asset=True):
+
+        key = ('assets' if from_asset else 'templates') + ':' + relpath
+
+        if key not in self._template_digests:
+            sources = self.template_sources(relpath, from_asset)
+            self._template_digests[key] = self._sources_digest(sources, from_asset)
+        
+        return self._template_digests[key]
+    
+    def references_digest(self, relpath, from_asset=True):
+
+        # Like template_digest, but leaving the template itself out, used by the 
+        # cache tag, which digests its own block
+
+        key = ('assets' if from_asset else 'templates') + '-references:' + relpath
+
+        if key not in self._template_digests:
+            sources = self.template_sources(relpath, from_asset)[1:]
+            self._template_digests[key] = self._sources_digest(sources, from_asset)
+        
+        return self._template_digests[key]
+    
+    def _sources_digest(self, sources, from_asset):
+
+        folderpath = self.args.assets if from_asset else self.args.templates
+        hasher = hashlib.sha1()
+
+        for name, source_digest in sources:
+            if name is None:
+                hasher.update(self.folder_digest(folderpath).encode('utf-8'))
+            else:
+                hasher.update(f'{name}:{source_digest}'.encode('utf-8'))
+        
+        return hasher.hexdigest()
+    
+    def invalidate(self):
+
+        # Forgets everything derived from the style files, used after they change
+        
+        self._clear_digests()
+
+        if self.args.frozen:
+            for env in self.envs.values():
+                if env is not None and env.cache is not None:
+                    env.cache.clear()
+    
+    def _clear_digests(self):
+        self._template_digests = {}
+        self._folder_digests = {}
+        SCANS.clear()
+    
+    def meta_digest(self, meta):
+
+        value = unwrap(meta)
+
+        if self.meta_digest_hint is not None and self.meta_digest_hint[0] is value:
+            return self.meta_digest_hint[1]
+        
+        return digest_json(value)
+    
+    def nested_digests(self, keys):
+
+        # Digests of the templates inflated while rendering an output, listed 
+        # as prefix:relpath keys, like assets:card.txt
+
+        digests = {}
+
+        for key in keys:
+            prefix, relpath = key.split(':', 1)
+            digests[key] = self.template_digest(relpath, prefix == 'assets')
+        
+        return digests
+    
+    def is_output_fresh(self, entry, template_digest, meta):
+
+        if entry is None or entry['template'] != template_digest:
+            return False
+        
+        if 'nested' in entry:
+            try:
+                if self.nested_digests(entry['nested']) != entry['nested']:
+                    return False
+            except IOError:
+                return False
+        
+        if 'deps' in entry:
+            return isinstance(meta, Meta) and are_deps_unchanged(meta_root(meta), entry['deps'])
+        
+        return entry['meta'] == self.meta_digest(meta)
+    
+    def inflate(self, relpath, meta, to_file=None, from_asset=True, return_text=False):
+
+        # With --stream, outputs written to a file are rendered in chunks and 
+        # their text is only returned when return_text is set
+
+        if PROFILER is None:
+            return self._inflate(relpath, meta, to_file, from_asset, return_text)
+        
+        with PROFILER.span('inflate' if from_asset else 'template', to_file or relpath):
+            return self._inflate(relpath, meta, to_file, from_asset, return_text)
+    
+    def _inflate(self, relpath, meta, to_file, from_asset, return_text):
+        
+        env = self._get_env(from_asset)
+        streaming = to_file is not None and self.args.stream and self.archive is None and not return_text
+
+        # Templates inflated by the one being rendered are recorded, so their 
+        # changes also invalidate its output
+
+        if self._nested:
+            self._nested[-1].add(('assets:' if from_asset else 'templates:') + relpath)
+
+        if to_file is not None:
+            
+            filepath_out = os.path.join(self.args.output, to_file)
+            self.produced.append(to_file)
+
+            if self.manifest is not None:
+                template_digest = self.template_digest(relpath, from_asset)
+                entry = self.manifest.get('outputs', to_file)
+
+                if self.is_output_fresh(entry, template_digest, meta) and os.path.isfile(filepath_out):
+                    debug("  Unchanged:", to_file)
+                    self.manifest.set('outputs', to_file, entry)
+                    self.unchanged += 1
+
+                    if TRACER is not None:
+                        extend_tracer(meta, entry)
+                    
+                    self.inflated[to_file] = sorted(entry.get('nested', ()))
+
+                    if self._nested:
+                        self._nested[-1].update(entry.get('nested', ()))
+                    
+                    if streaming:
+                        return None
+
+                    with open(filepath_out, 'r') as fin:
+                        return fin.read()
+        
+        template = env.get_template(relpath)
+        context = {'args': self.args, 'meta': meta, 'inflater': self}
+
+        self._nested.append(set())
+
+        try:
+            if to_file is not None and self.manifest is not None and self.args.trace:
+                parent = push_tracer(meta_root(meta) if isinstance(meta, Meta) else meta)
+                try:
+                    text = self._stream(filepath_out, template.generate(context)) if streaming else template.render(context)
+                finally:
+                    tracer = pop_tracer(parent)
+            else:
+                tracer = None
+                text = self._stream(filepath_out, template.generate(context)) if streaming else template.render(context)
+        finally:
+            nested = self._nested.pop()
+        
+        if self._nested:
+            self._nested[-1].update(nested)
+
+        if to_file is not None:
+            self.inflated[to_file] = sorted(nested)
+
+            if streaming:
+                pass
+            elif self.archive is not None:
+                self.archive.add(to_file, encode_output(text))
+                self.rewritten += 1
+            else:
+                self._write(filepath_out, text)
+
+            if self.manifest is not None:
+                entry = {'template': template_digest}
+
+                if nested:
+                    entry['nested'] = self.nested_digests(sorted(nested))
+
+                if tracer is not None and tracer.valid:
+                    entry['deps'] = tracer.deps()
+                else:
+                    entry['meta'] = self.meta_digest(meta)
+                
+                self.manifest.set('outputs', to_file, entry)
+
+        return text
+    
+    def _stream(self, filepath_out, chunks):
+
+        # Writes the chunks as they are rendered, keeping the memory used flat. 
+        # They go to a temporary file, replacing the output only on success, 
+        # and with only_changed only when the content differs.
+
+        os.makedirs(os.path.dirname(filepath_out), exist_ok=True)
+        tmp_filepath = filepath_out + '.tmp'
+
+        try:
+            with open(tmp_filepath, 'w', buffering=STREAM_BUFFER_SIZE) as fout:
+                for chunk in chunks:
+                    fout.write(chunk)
+        except BaseException:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+        
+        if self.args.only_changed and is_same_file(tmp_filepath, filepath_out):
+            debug("  Unchanged:", filepath_out)
+            os.remove(tmp_filepath)
+            self.unchanged += 1
+            return None
+        
+        os.replace(tmp_filepath, filepath_out)
+        self.rewritten += 1
+        return None
+
+    def _write(self, filepath_out, text):
+
+        if self.args.only_changed:
+
+            # Compares the bytes text mode would write, checking the size first
+            
+            data = encode_output(text)
+
+            if is_file_content(filepath_out, data):
+                debug("  Unchanged:", filepath_out)
+                self.unchanged += 1
+                return
+        
+        folderpath_out = os.path.dirname(filepath_out)
+        
+        os.makedirs(folderpath_out, exist_ok=True)
+        
+        with open(filepath_out, "w") as fout:
+            fout.write(text)
+        
+        self.rewritten += 1
+
+ARCHIVE_FORMATS = [
+    ('.tar', 'w'), 
+    ('.tar.gz', 'w:gz'), 
+    ('.tgz', 'w:gz'), 
+    ('.tar.bz2', 'w:bz2'), 
+    ('.tar.xz', 'w:xz'), 
+    ('.txz', 'w:xz'), 
+    ('.zip', 'zip')
+]
+
+class ArchiveWriter:
+
+    # Streams the output files into a tar or zip archive, which is written to a 
+    # temporary file and only replaces the previous archive when complete.
+
+    def __init__(self, filepath):
+        
+        mode = next((mode for extension, mode in ARCHIVE_FORMATS if filepath.endswith(extension)), None)
+
+        if mode is None:
+            raise ValueError(f"Unknown archive format: {filepath}")
+        
+        folderpath = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(folderpath, exist_ok=True)
+
+        self.name = filepath
+        self.filepath = filepath
+        self.tmp_filepath = filepath + '.tmp'
+        self.lock = threading.Lock()
+        self.count = 0
+
+        if mode == 'zip':
+            import zipfile
+            self.zip = zipfile.ZipFile(self.tmp_filepath, 'w', zipfile.ZIP_DEFLATED)
+            self.tar = None
+        else:
+            import tarfile
+            self.tar = tarfile.open(self.tmp_filepath, mode)
+            self.zip = None
+    
+    def add(self, relpath, data):
+
+        arcname = relpath.replace(os.sep, '/')
+
+        with self.lock:
+            if self.zip is not None:
+                import zipfile
+                info = zipfile.ZipInfo(arcname, time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                self.zip.writestr(info, data)
+            else:
+                import tarfile
+                info = tarfile.TarInfo(arcname)
+                info.size = len(data)
+                info.mtime = time.time()
+                info.mode = 0o644
+                self.tar.addfile(info, io.BytesIO(data))
+            
+            self.count += 1
+    
+    def add_file(self, filepath, relpath):
+
+        arcname = relpath.replace(os.sep, '/')
+
+        with self.lock:
+            if self.zip is not None:
+                self.zip.write(filepath, arcname)
+            else:
+                self.tar.add(filepath, arcname)
+            
+            self.count += 1
+    
+    def collect(self):
+        return []
+    
+    def close(self):
+        (self.zip or self.tar).close()
+        os.replace(self.tmp_filepath, self.filepath)
+    
+    def discard(self):
+        (self.zip or self.tar).close()
+        os.remove(self.tmp_filepath)
+
+
+class ArchiveBuffer:
+
+    # Keeps the files rendered by a worker process until they are handed to the 
+    # ArchiveWriter in the main process.
+
+    def __init__(self):
+        self.files = []
+    
+    def add(self, relpath, data):
+        self.files.append((relpath, data))
+    
+    def collect(self):
+        files = self.files
+        self.files = []
+        return files
+
+class MemoryOutput:
+
+    # Keeps the output files as bytes, for the python API
+
+    name = 'memory'
+
+    def __init__(self):
+        self.files = {}
+        self.count = 0
+    
+    def add(self, relpath, data):
+        self.files[relpath] = data
+        self.count += 1
+    
+    def add_file(self, filepath, relpath):
+        with open(filepath, 'rb') as fin:
+            self.add(relpath, fin.read())
+    
+    def collect(self):
+        return []
+    
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+def encode_output(text):
+
+    # The bytes text mode would write
+
+    data = text.replace('\n', os.linesep) if os.linesep != '\n' else text
+    return data.encode(locale.getpreferredencoding(False))
+
+STREAM_BUFFER_SIZE = 1 << 20
+
+def is_same_file(filepath, other_filepath):
+
+    try:
+        if os.path.getsize(filepath) != os.path.getsize(other_filepath):
+            return False
+        
+        with open(filepath, 'rb') as fin, open(other_filepath, 'rb') as other:
+            while True:
+                chunk = fin.read(STREAM_BUFFER_SIZE)
+                if chunk != other.read(STREAM_BUFFER_SIZE):
+                    return False
+                if not chunk:
+                    return True
+    
+    except FileNotFoundError:
+        return False
+
+def is_file_content(filepath, data):
+
+    try:
+        if os.path.getsize(filepath) != len(data):
+            return False
+        
+        with open(filepath, 'rb') as fin:
+            return fin.read() == data
+    
+    except FileNotFoundError:
+        return False
+
+OUTPUTS_FILENAME = '.mell-outputs.json'
+
+def do_prune(args, produced):
+
+    # Only files that a previous run with --prune recorded as produced by one of 
+    # the actions executed now are deleted. Anything else in the output folder 
+    # is left alone.
+
+    info("Pruning stale output files")
+
+    filepath = os.path.join(args.output, OUTPUTS_FILENAME)
+
+    try:
+        with open(filepath, 'r') as fin:
+            previous = json.loads(fin.read())
+    except (OSError, ValueError):
+        previous = {}
+    
+    current = dict(previous)
+    current.update(produced)
+    
+    keep = set(relpath for relpaths in current.values() for relpath in relpaths)
+    removed = 0
+
+    for name, relpaths in previous.items():
+        if name not in produced:
+            continue
+        
+        for relpath in relpaths:
+            if relpath in keep or os.path.isabs(relpath) or os.path.normpath(relpath).startswith('..'):
+                continue
+
+            filepath_out = os.path.join(args.output, relpath)
+
+            if os.path.isfile(filepath_out):
+                debug("  Removing:", filepath_out)
+                os.remove(filepath_out)
+                remove_empty_folders(args.output, os.path.dirname(filepath_out))
+                removed += 1
+    
+    os.makedirs(args.output, exist_ok=True)
+    tmp_filepath = filepath + '.tmp'
+
+    with open(tmp_filepath, 'w') as fout:
+        fout.write(json.dumps(current))
+    
+    os.replace(tmp_filepath, filepath)
+    info(f"  Pruned {removed} stale output file(s)")
+
+def remove_empty_folders(rootpath, folderpath):
+
+    rootpath = os.path.abspath(rootpath)
+    folderpath = os.path.abspath(folderpath)
+
+    while folderpath != rootpath and folderpath.startswith(rootpath) and not os.listdir(folderpath):
+        os.rmdir(folderpath)
+        folderpath = os.path.dirname(folderpath)
+
+def do_action_nothing(args, inflater, meta):
+    pass
+
+def do_clean(args):
+
+    if not args.clean:
+        return
+
+    info("Cleaning output directory")
+
+    if os.path.exists(args.output):
+        if os.path.isdir(args.output):
+            for filepath in glob.glob(os.path.join(args.output, '*')):
+                debug("  Removing:", filepath)
+                if os.path.isdir(filepath):
+                    shutil.rmtree(filepath)
+                else:
+                    os.remove(filepath)
+        else:
+            os.remove(args.output)
+    
+def is_static_unchanged(args, filepath, filepath_out):
+
+    try:
+        stat_out = os.stat(filepath_out)
+    except FileNotFoundError:
+        return False
+    
+    stat = os.stat(filepath)
+
+    if stat.st_size != stat_out.st_size:
+        return False
+    
+    if args.sync_hash:
+        return digest_file(filepath) == digest_file(filepath_out)
+    
+    return stat.st_mtime_ns == stat_out.st_mtime_ns
+
+def copy_static(args, filepath, filepath_out):
+
+    with profile('static', filepath_out):
+        return copy_static_file(args, filepath, filepath_out)
+
+def copy_static_file(args, filepath, filepath_out):
+
+    if args.sync and is_static_unchanged(args, filepath, filepath_out):
+        debug(f"  Unchanged: {filepath_out}")
+        return False
+    
+    debug(f"{filepath} -> {filepath_out}")
+
+    folderpath_out = os.path.dirname(filepath_out)
+    os.makedirs(folderpath_out, exist_ok=True)
+    shutil.copy2(filepath, filepath_out)
+    
+    return True
+
+def list_static_files(args):
+    return scan_folder(args, args.statics)
+
+def do_action_statics(args, inflater, meta):
+
+    info("Copying static data")
+
+    relpaths = list_static_files(args)
+
+    if inflater.archive is not None:
+        archive_statics(args, inflater.archive, relpaths)
+    else:
+        copy_statics(args, relpaths)
+    
+    inflater.produced.extend(relpaths)
+
+def archive_statics(args, archive, relpaths):
+
+    for relpath in relpaths:
+        with profile('static', relpath):
+            archive.add_file(os.path.join(args.statics, relpath), relpath)
+    
+    info(f"  Archived {len(relpaths)} static file(s)")
+
+def copy_statics(args, relpaths):
+
+    tasks = []
+
+    for relpath in relpaths:
+        filepath = os.path.join(args.statics, relpath)
+        filepath_out = os.path.join(args.output, relpath)
+        tasks.append((args, filepath, filepath_out))
+
+    if args.jobs > 1 and len(tasks) > 1:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(args.jobs) as executor:
+            copied = list(executor.map(lambda task: copy_static(*task), tasks))
+    else:
+        copied = [copy_static(*task) for task in tasks]
+    
+    info(f"  Copied {sum(copied)} static file(s), skipped {len(copied) - sum(copied)}")
+
+def list_template_files(args):
+    return scan_folder(args, args.templates)
+
+def init_template_worker(args, manifest, meta_value, meta_digest_hint, log_level):
+
+    global WORKER, LOG_LEVEL, PROFILER
+
+    LOG_LEVEL = log_level
+    PROFILER = Profiler() if args.profile else None
+
+    if manifest is not None:
+        manifest.current = {key: {} for key in manifest.current}
+    
+    meta = Meta(meta_value)
+    inflater = Inflater(args, manifest)
+    inflater.archive = ArchiveBuffer() if args.output_archive else None
+
+    if meta_digest_hint is not None:
+        inflater.meta_digest_hint = (meta_value, meta_digest_hint)
+    
+    WORKER = (inflater, meta)
+
+def render_template_worker(relpath):
+
+    inflater, meta = WORKER
+    debug("  ", relpath)
+
+    try:
+        inflater.inflate(relpath, meta, to_file=relpath, from_asset=False)
+        return relpath, None, inflater.collect()
+    except Exception:
+        return relpath, format_exception(), inflater.collect()
+
+def render_templates_in_parallel(args, inflater, meta, relpaths):
+
+    # The metadata is handed to each worker once, when it starts, as a python 
+    # object. Results are consumed in submission order, making the outcome 
+    # independent of the scheduling.
+
+    meta_digest_hint = inflater.meta_digest_hint[1] if inflater.meta_digest_hint is not None else None
+    initargs = (args, inflater.manifest, meta.value, meta_digest_hint, LOG_LEVEL)
+    jobs = min(args.jobs, len(relpaths))
+    chunksize = max(1, len(relpaths) // (jobs * 4))
+    failures = []
+
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=init_template_worker, initargs=initargs) as executor:
+        for relpath, failure, report in executor.map(render_template_worker, relpaths, chunksize=chunksize):
+            inflater.merge(report)
+            if failure is not None:
+                failures.append((relpath, failure))
+    
+    if failures:
+        for _, failure in failures:
+            print(failure, file=sys.stderr, end='')
+        error("Failed to render the template(s):", ', '.join(relpath for relpath, _ in failures))
+
+def do_action_templates(args, inflater:Inflater, meta:Meta):
+
+    info("Generating template based files")
+    render_templates(args, inflater, meta, list_template_files(args))
+
+def render_templates(args, inflater, meta, relpaths):
+
+    if inflater.manifest is not None:
+        inflater.meta_digest_hint = (meta.value, inflater.meta_digest(meta))
+    
+    if args.jobs > 1 and len(relpaths) > 1:
+        render_templates_in_parallel(args, inflater, meta, relpaths)
+
+    else:
+        for relpath in relpaths:
+            debug("  ", relpath)
+            inflater.inflate(relpath, meta, to_file=relpath, from_asset=False)
+    
+    inflater.meta_digest_hint = None
+
+
+def do_action_generators(args, inflater, meta):
+    
+    info("Executing generator files")
+
+    rootpath = os.path.dirname(args.generators)
+    generators = []
+
+    for relpath in scan_folder(args, args.generators):
+        if os.sep not in relpath and relpath.endswith('.py'):
+            filepath = os.path.join(args.generators, relpath)
+            generator_name = os.path.relpath(filepath, rootpath).replace('\\', '.').replace('/', '.')
+            generators.append((generator_name, filepath))
+    
+    if args.isolated_generators:
+        run_generators_in_parallel(args, inflater, meta, sorted(generators))
+    
+    else:
+        for generator_name, filepath in generators:
+            execute_generator(args, inflater, meta, generator_name, filepath)
+
+def execute_generator(args, inflater, meta, generator_name, filepath):
+
+    debug("  ", filepath)
+    
+    if inflater.manifest is None:
+        run_generator(args, inflater, meta, generator_name, filepath)
+    
+    elif not is_generator_fresh(args, inflater, meta, generator_name, filepath):
+        run_tracked_generator(args, inflater, meta, generator_name, filepath)
+
+def init_generator_worker(*initargs):
+
+    global READONLY_META
+
+    init_template_worker(*initargs)
+    READONLY_META = True
+
+def run_generator_worker(generator):
+
+    # Every generator receives its own copy of the metadata and its own 
+    # inflater, so changes made by one, even through meta.value, never reach 
+    # the next one executed by the same worker
+
+    worker_inflater, worker_meta = WORKER
+    generator_name, filepath = generator
+
+    meta = Meta(copy_json(worker_meta.value))
+    inflater = worker_inflater.fork(worker_inflater.args)
+    inflater.manifest = worker_inflater.manifest
+    inflater.archive = ArchiveBuffer() if worker_inflater.archive is not None else None
+
+    if worker_inflater.meta_digest_hint is not None:
+        inflater.meta_digest_hint = (meta.value, worker_inflater.meta_digest_hint[1])
+    
+    stdout = io.StringIO()
+
+    try:
+        with redirect_stdout(stdout):
+            execute_generator(inflater.args, inflater, meta, generator_name, filepath)
+        return stdout.getvalue(), None, inflater.collect()
+    except Exception:
+        return stdout.getvalue(), format_exception(), inflater.collect()
+
+def run_generators_in_parallel(args, inflater, meta, generators):
+
+    # Each generator receives its own copy of the metadata, so they do not 
+    # depend on each other. Assignments through meta are rejected, as they 
+    # would be lost. Their output is printed in name order, after they finish.
+
+    if not generators:
+        return
+    
+    meta_digest = inflater.meta_digest(meta) if inflater.manifest is not None else None
+    initargs = (args, inflater.manifest, meta.value, meta_digest, LOG_LEVEL)
+    jobs = max(1, min(args.jobs, len(generators)))
+    failures = []
+
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=init_generator_worker, initargs=initargs) as executor:
+        for (generator_name, _), (stdout, failure, report) in zip(generators, executor.map(run_generator_worker, generators)):
+            print(stdout, end='')
+            inflater.merge(report)
+            debug(f"  {generator_name} wrote {len(report['produced'])} file(s)")
+            if failure is not None:
+                failures.append((generator_name, failure))
+    
+    if failures:
+        for _, failure in failures:
+            print(failure, file=sys.stderr, end='')
+        error("Failed to execute the generator(s):", ', '.join(generator_name for generator_name, _ in failures))
+
+def run_generator(args, inflater, meta, generator_name, filepath):
+
+    with profile('generator', generator_name):
+        generator = load_script(generator_name, filepath)
+        run_profiled(args, generator_name, generator.generate, args, meta, inflater)
+
+def run_tracked_generator(args, inflater, meta, generator_name, filepath):
+
+    first_output = len(inflater.produced)
+    meta_before = inflater.meta_digest(meta)
+    tracer = None
+
+    if args.trace:
+        parent = push_tracer(meta)
+        try:
+            run_generator(args, inflater, meta, generator_name, filepath)
+        finally:
+            tracer = pop_tracer(parent)
+    else:
+        run_generator(args, inflater, meta, generator_name, filepath)
+    
+    entry = {
+        'digest': generator_digest(inflater, filepath),
+        'pure': meta_before == inflater.meta_digest(meta),
+        'outputs': inflater.produced[first_output:]
+    }
+
+    if tracer is not None and tracer.valid:
+        entry['deps'] = tracer.deps()
+    else:
+        entry['meta'] = meta_before
+
+    inflater.manifest.set('generators', generator_name, entry)
+
+def generator_digest(inflater, filepath):
+
+    # Generators may inflate anything from the assets and templates folders, so 
+    # both are part of the digest.
+
+    parts = [digest_file(filepath)]
+
+    for folderpath in [inflater.args.assets, inflater.args.templates]:
+        if os.path.isdir(folderpath):
+            parts.append(inflater.folder_digest(folderpath))
+    
+    return digest_text(':'.join(parts))
+
+def is_generator_fresh(args, inflater, meta, generator_name, filepath):
+
+    # A generator that changed the metadata during its last run can't be skipped, 
+    # as the generators executed after it depend on these changes.
+
+    entry = inflater.manifest.get('generators', generator_name)
+
+    if entry is None or not entry['pure']:
+        return False
+
+    if entry['digest'] != generator_digest(inflater, filepath):
+        return False
+    
+    if 'deps' in entry:
+        if not are_deps_unchanged(meta, entry['deps']):
+            return False
+    elif entry['meta'] != inflater.meta_digest(meta):
+        return False
+    
+    for relpath in entry['outputs']:
+        if not os.path.isfile(os.path.join(args.output, relpath)):
+            return False
+    
+    debug("  Unchanged:", filepath)
+
+    inflater.manifest.set('generators', generator_name, entry)
+    inflater.produced.extend(entry['outputs'])
+
+    for relpath in entry['outputs']:
+        output_entry = inflater.manifest.get('outputs', relpath)
+        if output_entry is not None:
+            inflater.manifest.set('outputs', relpath, output_entry)
+    
+    return True
+
+def load_script(name, filepath):
+
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, filepath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def get_sorted_script_files(args, folderpath):
+
+    filepaths = []
+
+    for filename in scan_folder(args, folderpath):
+        if os.sep not in filename and filename.endswith('.py'):
+            filepath = os.path.join(folderpath, filename)
+            cells = filename.split('.', 1)
+            if len(cells) == 2:
                 try:
                     timestamp = int(cells[0])
                     filepaths.append((timestamp, filepath))
@@ -654,104 +2731,542 @@ def get_sorted_script_files(folderpath):
     filepaths.sort()
     return filepaths
 
-def do_migrations(args, meta):
+def do_migrations(args, meta):
+    
+    info("Executing migration files")
+    
+    rootpath = os.path.dirname(args.migrations)
+    filepaths = get_sorted_script_files(args, args.migrations)
+    migrations = []
+
+    for _, filepath in filepaths:
+        migration_name = os.path.relpath(filepath, rootpath).replace('\\', '.').replace('/', '.')
+        migrations.append((migration_name, filepath))
+    
+    if args.checkpoints:
+        chain = checkpoint_filepaths(args, meta, migrations)
+        meta, migrations, checkpoints = restore_checkpoint(meta, migrations, chain)
+    
+    for i, (migration_name, filepath) in enumerate(migrations):
+        debug("  Applying migration ", filepath)
+        start = time.perf_counter()
+        
+        with profile('migration', migration_name):
+            migration = load_script(migration_name, filepath)
+            run_profiled(args, migration_name, migration.migrate, args, meta)
+
+        info(f"  Applied migration {migration_name} in {time.perf_counter() - start:.3f}s")
+
+        if args.checkpoints:
+            save_snapshot(checkpoints[i], meta)
+    
+    if args.checkpoints:
+        remove_stale_files(os.path.join(args.cache, 'checkpoints', meta_group(args)), set(chain))
+    
+    return meta
+
+def checkpoint_filepaths(args, meta, migrations):
+
+    # Each checkpoint key chains the previous one with the next script, so 
+    # changing a migration invalidates it and every checkpoint after it
+
+    folderpath = os.path.join(args.cache, 'checkpoints', meta_group(args))
+    key = digest_json(meta)
+    checkpoints = []
+
+    for migration_name, filepath in migrations:
+        key = digest_text(key + migration_name + digest_file(filepath))
+        checkpoints.append(os.path.join(folderpath, key + '.pickle'))
+    
+    return checkpoints
+
+def restore_checkpoint(meta, migrations, checkpoints):
+
+    for i in range(len(checkpoints) - 1, -1, -1):
+        restored = load_snapshot(checkpoints[i])
+
+        if restored is not None:
+            info(f"  Restored the checkpoint after {migrations[i][0]}")
+            return restored, migrations[i+1:], checkpoints[i+1:]
+    
+    return meta, migrations, checkpoints
+
+ADDRESS_INDEX = re.compile(r'\[(\d+)\]')
+
+def parse_bool(value):
+
+    value = value.strip().lower()
+
+    if value in ['true', 'yes', 'on', '1']:
+        return True
+    
+    if value in ['false', 'no', 'off', '0', '']:
+        return False
+    
+    raise ValueError(f"expected a boolean, got '{value}'")
+
+SET_VALUE_TYPES = {
+    'str':str, 
+    'int': int, 
+    'float': float, 
+    'bytes':bytes, 
+    'bool':parse_bool,
+    'json':json.loads
+}
+
+def compile_address(address):
+
+    # user.backpack[1] -> ['user', 'backpack', 1]
+
+    keys = [ADDRESS_INDEX.split(x) for x in address.split('.')]
+    return [x if i % 2 == 0 else int(x) for y in keys for i, x in enumerate(y) if x]
+
+def compile_pointer(pointer):
+
+    # RFC 6901, /user/backpack/1 -> ['user', 'backpack', '1']. Numeric keys stay 
+    # strings, as they only become indexes inside lists.
+
+    if pointer == '':
+        return []
+    
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise ValueError(f"invalid JSON pointer '{pointer}'")
+    
+    return [x.replace('~1', '/').replace('~0', '~') for x in pointer[1:].split('/')]
+
+def format_address(keys):
+    return ''.join(f'[{x}]' if isinstance(x, int) else f'.{x}' for x in keys).lstrip('.')
+
+def load_set_file(filepath):
+
+    # Returns a list of overrides, (keys, value) pairs, and RFC 6902 operations, 
+    # in the order they appear. The file may contain a JSON object mapping 
+    # addresses to values, a JSON Patch, or one of these per line (NDJSON).
+
+    try:
+        with open(filepath, 'r') as fin:
+            data = fin.read()
+    except OSError as e:
+        error(f"Could not read the set file {filepath} - {e}")
+    
+    try:
+        documents = [json.loads(data)]
+    except ValueError:
+        try:
+            documents = [json.loads(line) for line in data.splitlines() if line.strip()]
+        except ValueError as e:
+            error(f"Invalid set file {filepath} - {e}")
+    
+    changes = []
+
+    for document in documents:
+        items = document if isinstance(document, list) else [document]
+
+        for item in items:
+            if not isinstance(item, dict):
+                error(f"Invalid set file {filepath} - expected objects, got {json.dumps(item)}")
+            
+            if 'op' in item:
+                operation = dict(item)
+
+                try:
+                    operation['path'] = compile_pointer(item.get('path'))
+                    if 'from' in item:
+                        operation['from'] = compile_pointer(item['from'])
+                except ValueError as e:
+                    error(f"Invalid operation in the set file {filepath} - {e}")
+                
+                changes.append(operation)
+            
+            else:
+                changes.extend((compile_address(address), value) for address, value in item.items())
+    
+    return changes
+
+NO_VALUE = object()
+
+def add_override(trie, keys, value):
+
+    # Overrides are kept in a trie, so addresses sharing a prefix are walked only 
+    # once. Setting a value discards the deeper overrides set before it.
+
+    node = [NO_VALUE, trie]
+
+    for key in keys:
+        node = node[1].setdefault(key, [NO_VALUE, {}])
+    
+    node[0] = value
+    node[1] = {}
+
+def set_child(current, key, value, next_key):
+
+    # Assigns value to current[key] or, without a value, creates the container 
+    # addressed by next_key if current[key] does not exist yet
+
+    if isinstance(key, str):
+        if isinstance(current, dict):
+            if value is not NO_VALUE:
+                current[key] = value
+            elif not key in current:
+                current[key] = [] if isinstance(next_key, int) else {}
+        elif isinstance(current, list):
+            raise ValueError(f"expected an address, got the property name `.{key}'")
+        else:
+            raise ValueError(f"expected nothing, got the property name `.{key}'")
+    
+    else:
+        if isinstance(current, list):
+            if key >= len(current):
+                if value is not NO_VALUE:
+                    current += [None for _ in range(key + 1 - len(current))]
+                else:
+                    container = list if isinstance(next_key, int) else dict
+                    current += [container() for _ in range(key + 1 - len(current))]
+            if value is not NO_VALUE:
+                current[key] = value
+        elif isinstance(current, dict):
+            raise ValueError(f"expected a property name, got the address [{key}]")
+        else:
+            raise ValueError(f"expected nothing, got the address [{key}]")
+
+def apply_overrides(current, trie, keys=()):
+
+    for key, (value, children) in trie.items():
+        child_keys = keys + (key,)
+
+        try:
+            set_child(current, key, value, next(iter(children)) if children else None)
+
+            if children:
+                apply_overrides(current[key], children, child_keys)
+        
+        except ValueError as e:
+            warn(f"Invalid property '{format_address(child_keys)}' - {e}")
+        except IndexError:
+            warn(f"Invalid property '{format_address(child_keys)}', index {key} is out of range")
+
+def resolve_pointer(root, keys):
+
+    # Returns the container holding the last key, and that key as an index for 
+    # lists
+
+    current = root
+
+    for key in keys[:-1]:
+        current = current[int(key) if isinstance(current, list) else key]
+    
+    key = keys[-1]
+
+    if isinstance(current, list) and key != '-':
+        key = int(key)
+    elif not isinstance(current, (dict, list)):
+        raise TypeError(f"can't index a {type(current).__name__}")
+    
+    return current, key
+
+def apply_patch_operation(root, operation):
+
+    op = operation['op']
+    path = operation['path']
+
+    if not path:
+        raise ValueError("operations on the whole metadata are not supported")
+    
+    if op == 'test':
+        container, key = resolve_pointer(root, path)
+        if container[key] != operation['value']:
+            raise ValueError("test failed")
+        return
+    
+    if op in ['remove', 'replace', 'move']:
+        container, key = resolve_pointer(root, operation['from'] if op == 'move' else path)
+        value = container[key]
+        del container[key]
+        if op == 'remove':
+            return
+    elif op == 'copy':
+        container, key = resolve_pointer(root, operation['from'])
+        value = copy_json(container[key])
+    elif op == 'add':
+        value = operation['value']
+    else:
+        raise ValueError(f"unknown operation '{op}'")
+    
+    if op == 'replace':
+        value = operation['value']
+    
+    container, key = resolve_pointer(root, path)
+
+    if isinstance(container, list):
+        if key == '-':
+            container.append(value)
+        elif 0 <= key <= len(container):
+            container.insert(key, value)
+        else:
+            raise IndexError(key)
+    else:
+        container[key] = value
+
+def do_set_values(args, meta):
+
+    info("Applying set")
+
+    changes = []
+
+    for filepath in args.set_file:
+        changes.extend(load_set_file(filepath))
+
+    for set in args.set:
+        value_type = str if len(set) < 3 else SET_VALUE_TYPES[set[2]]
+
+        try:
+            changes.append((compile_address(set[0]), value_type(set[1])))
+        except ValueError as e:
+            warn(f"Invalid value for '{set[0]}' - {e}")
+    
+    # Consecutive overrides are applied together, in a single pass over the 
+    # metadata. Patch operations depend on everything before them, so they are 
+    # applied one by one.
+
+    trie = {}
+
+    for change in changes:
+        if isinstance(change, tuple):
+            keys, value = change
+            if keys:
+                add_override(trie, keys, value)
+            continue
+        
+        apply_overrides(meta.value, trie)
+        trie = {}
+
+        try:
+            apply_patch_operation(meta.value, change)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            error(f"Failed to apply the {change['op']} operation at /{'/'.join(change['path'])} - {e!r}")
+    
+    apply_overrides(meta.value, trie)
+
+WATCHED_FOLDERS = ['meta', 'migrations', 'templates', 'assets', 'generators', 'statics']
+
+
+class PollingWatcher:
+
+    def __init__(self, folderpaths, interval):
+        self.folderpaths = folderpaths
+        self.interval = interval
+        self.snapshot = self._scan()
+    
+    def _scan(self):
+
+        snapshot = {}
+
+        for folderpath in self.folderpaths:
+            for dirpath, dirnames, filenames in os.walk(folderpath):
+                dirnames[:] = [x for x in dirnames if not x.startswith('.')]
+                for filename in filenames:
+                    if not filename.startswith('.'):
+                        filepath = os.path.join(dirpath, filename)
+                        try:
+                            stat = os.stat(filepath)
+                            snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+                        except FileNotFoundError:
+                            pass
+        
+        return snapshot
+    
+    def _changes(self):
+
+        snapshot = self._scan()
+        changed = {x for x in snapshot.keys() | self.snapshot.keys() if snapshot.get(x) != self.snapshot.get(x)}
+        self.snapshot = snapshot
+        
+        return changed
+
+    def wait(self):
+
+        # Blocks until something changes, then waits for the folders to settle
+
+        changed = set()
+
+        while not changed:
+            time.sleep(self.interval)
+            changed = self._changes()
+        
+        while True:
+            time.sleep(self.interval)
+            more = self._changes()
+            if not more:
+                return changed
+            changed |= more
+
+
+class InotifyWatcher:
+
+    def __init__(self, folderpaths, interval, inotify_simple):
+        self.interval = interval
+        self.flags = inotify_simple.flags
+        self.inotify = inotify_simple.INotify()
+        self.mask = self.flags.CREATE | self.flags.CLOSE_WRITE | self.flags.DELETE | self.flags.MOVED_FROM | self.flags.MOVED_TO
+        self.dirpaths = {}
+
+        for folderpath in folderpaths:
+            self._add(folderpath)
+    
+    def _add(self, folderpath):
+
+        filepaths = set()
+
+        for dirpath, dirnames, filenames in os.walk(folderpath):
+            dirnames[:] = [x for x in dirnames if not x.startswith('.')]
+            wd = self.inotify.add_watch(dirpath, self.mask)
+            self.dirpaths[wd] = dirpath
+            filepaths.update(os.path.join(dirpath, x) for x in filenames if not x.startswith('.'))
+        
+        return filepaths
+
+    def wait(self):
+
+        changed = set()
+        events = self.inotify.read()
+
+        while events:
+            for event in events:
+                dirpath = self.dirpaths.get(event.wd)
+                if dirpath is None or not event.name or event.name.startswith('.'):
+                    continue
+                
+                path = os.path.join(dirpath, event.name)
+
+                if not event.mask & self.flags.ISDIR:
+                    changed.add(path)
+                elif event.mask & (self.flags.CREATE | self.flags.MOVED_TO):
+                    changed |= self._add(path)
+            
+            events = self.inotify.read(timeout=int(self.interval * 1000))
+        
+        return changed
+
+
+def create_watcher(folderpaths, interval):
+
+    try:
+        import inotify_simple
+        watcher = InotifyWatcher(folderpaths, interval, inotify_simple)
+        debug("Watching with inotify")
+        return watcher
+    except (ImportError, OSError):
+        debug("Watching with polling")
+        return PollingWatcher(folderpaths, interval)
+
+def classify_changes(args, filepaths):
+
+    # Nested folders, like a templates folder inside the metadata folder, are 
+    # matched against the innermost one.
+
+    changes = {name: set() for name in WATCHED_FOLDERS}
+    folders = [(os.path.abspath(getattr(args, name)), name) for name in WATCHED_FOLDERS]
+    folders.sort(key=lambda x: len(x[0]), reverse=True)
+
+    for filepath in filepaths:
+        filepath = os.path.abspath(filepath)
+        for folderpath, name in folders:
+            if filepath.startswith(folderpath + os.sep):
+                changes[name].add(os.path.relpath(filepath, folderpath))
+                break
+    
+    return changes
+
+def is_template_affected(inflater, relpath, changes):
+
+    # Besides its own sources, a template depends on the ones it inflated in 
+    # the previous render, like an asset rendered through inflater.inflate
+
+    sources = [(name, False) for name, _ in inflater.template_sources(relpath, from_asset=False)]
+
+    for key in inflater.inflated.get(relpath, ()):
+        prefix, nested_relpath = key.split(':', 1)
+        from_asset = prefix == 'assets'
+
+        try:
+            sources.extend((name, from_asset) for name, _ in inflater.template_sources(nested_relpath, from_asset))
+        except IOError:
+            return True
     
-    info("Executing migration files")
+    for name, from_asset in sources:
+        if name is None or name in changes['assets' if from_asset else 'templates']:
+            return True
     
-    rootpath = os.path.dirname(args.migrations)
-    filepaths = get_sorted_script_files(args.migrations)
+    return False
+
+def run_watch_cycle(args, inflater, meta_value, changes):
+
+    # Every cycle starts from the metadata as it was after the migrations, as 
+    # generators may have changed it in the previous cycle.
+
+    inflater.invalidate()
+    inflater.collect()
+
+    reload_meta = bool(changes['meta'] or changes['migrations'])
+
+    if reload_meta:
+        meta_value = copy.deepcopy(do_prepare_meta(args).value)
     
-    for _, filepath in filepaths:
-        migration_name = os.path.relpath(filepath, rootpath).replace('\\', '.').replace('/', '.')
-        debug("  Applying migration ", filepath)
-        
-        migration_spec = importlib.util.spec_from_file_location(migration_name, filepath)
-        migration = importlib.util.module_from_spec(migration_spec)
-        migration_spec.loader.exec_module(migration)
-        migration.migrate(args, meta)
+    meta = Meta(copy.deepcopy(meta_value))
 
-def do_set_values(args, meta):
+    if 'statics' in args.do and changes['statics']:
+        info("Copying static data")
+        scanned = set(list_static_files(args))
+        relpaths = [x for x in changes['statics'] if x in scanned]
+        copy_statics(args, sorted(relpaths))
+    
+    if 'templates' in args.do and (reload_meta or changes['templates'] or changes['assets']):
+        relpaths = list_template_files(args)
 
-    info("Applying set")
+        if not reload_meta:
+            relpaths = [x for x in relpaths if is_template_affected(inflater, x, changes)]
+        
+        info("Generating template based files")
+        render_templates(args, inflater, meta, relpaths)
     
-    r = re.compile('\[(\d+)\]')
+    if 'generators' in args.do and (reload_meta or changes['assets'] or changes['generators']):
+        do_action_generators(args, inflater, meta)
+    
+    do_save_manifest(args, inflater)
+    do_prune_fragments(args)
+    do_show_summary(args, inflater)
 
-    value_types = {
-        'str':str, 
-        'int': int, 
-        'float': float, 
-        'bytes':bytes, 
-        'bool':bool
-    }
+    return meta_value
 
-    for set in args.set:
+def do_watch(args, inflater, meta_value):
 
-        value_type = str if len(set) < 3 else value_types[set[2]]
+    if not args.watch:
+        return
+    
+    folderpaths = [getattr(args, name) for name in WATCHED_FOLDERS]
+    watcher = create_watcher([x for x in folderpaths if os.path.isdir(x)], args.watch_interval)
 
-        address = set[0]
-        value = value_type(set[1])
+    info("Watching for changes, press Ctrl+C to stop")
 
-        property_names = address.split('.')
-        property_names = [re.split(r, x) for x in property_names]
-        property_names = [x if i % 2 == 0 else int(x) for y in property_names for i,x in enumerate(y) if x]
+    try:
+        while True:
+            changes = classify_changes(args, watcher.wait())
 
-        current = meta.value
+            for name in WATCHED_FOLDERS:
+                for relpath in sorted(changes[name]):
+                    info(f"  Changed: {name}/{relpath}")
 
-        try:
-            for i, idx in enumerate(property_names[:-1]):
-                if isinstance(idx, str):
-                    if isinstance(current, dict):
-                        if not idx in current:
-                            next_idx = property_names[i+1]
-                            current[idx] = [] if isinstance(next_idx, int) else {}
-                    elif isinstance(current, list):
-                        raise ValueError(f"expected an address, got the property name `.{idx}'")
-                    else:
-                        raise ValueError(f"expected nothing, got the property name `.{idx}'")
-                else:
-                    if isinstance(current, list):
-                        if idx >= len(current):
-                            next_idx = property_names[i+1]
-                            if isinstance(next_idx, int):
-                                current += [[] for _ in range(idx + 1 - len(current))]
-                                current[idx] = []
-                            else:
-                                current += [{} for _ in range(idx + 1 - len(current))]
-                                current[idx] = {}
-                    elif isinstance(current, dict):
-                        raise ValueError(f"expected a property name, got the address [{idx}]")
-                    else:
-                        raise ValueError(f"expected nothing, got the address [{idx}]")
-                    
-                current = current[idx]
-            
-            idx = property_names[-1]
+            try:
+                meta_value = run_watch_cycle(args, inflater, meta_value, changes)
+            except MellError as e:
+                show_error(e)
+                warn("Failed to regenerate the files, waiting for changes")
+            except Exception:
+                print(format_exception(), file=sys.stderr, end='')
+                warn("Failed to regenerate the files, waiting for changes")
 
-            if isinstance(idx, str):
-                if isinstance(current, dict):
-                    current[idx] = value
-                elif isinstance(current, list):
-                    raise ValueError(f"expected an address, got the property name `.{idx}'")
-                else:
-                    raise ValueError(f"expected nothing, got the property name `.{idx}'")
-            else:
-                if isinstance(current, list):
-                    if idx >= len(current):
-                        current += [None for _ in range(idx + 1 - len(current))]
-                    current[idx] = value
-                elif isinstance(current, dict):
-                    raise ValueError(f"expected a property name, got the address [{idx}]")
-                else:
-                    raise ValueError(f"expected nothing, got the address [{idx}]")
-            
-        except ValueError as e:
-            msg = str(e)
-            if msg:
-                warn(f"Invalid property '{address}' - {msg}")
-            else:
-                warn(f"Invalid property '{address}'")
-        except IndexError:
-            warn(f"Invalid property '{address}', index {idx} is out of range")
+    except KeyboardInterrupt:
+        pass
 
 def do_show_metadata(args, meta):
 
@@ -778,32 +3293,686 @@ def do_load_meta(args):
     
     return Meta({})
     
+def do_show_profile(args):
+
+    if PROFILER is not None:
+        filepath = os.path.join(args.cache, 'profile.json')
+        PROFILER.save(filepath)
+        
+        print("Profile:")
+        print(PROFILER.summary())
+        print("Trace saved to", filepath)
+
+def do_show_summary(args, inflater):
+    info(f"Rewrote {inflater.rewritten} output file(s), {inflater.unchanged} unchanged")
+
+    hits, misses = inflater.fragment_cache.collect()
+
+    if hits or misses:
+        info(f"Fragment cache: {hits} hit(s), {misses} miss(es)")
+
+def do_save_manifest(args, inflater):
+    if inflater.manifest is not None:
+        info("Saving the manifest")
+        inflater.manifest.save()
+
+def do_prune_fragments(args):
+    if args.fragment_cache:
+        removed = prune_fragments(os.path.join(args.cache, 'fragments'), args.fragment_cache_limit)
+        debug(f"  Removed {removed} fragment(s) from the cache")
+
 def do_load_inflater(args):
     return Inflater(args)
 
-def main(*params):
+def snapshot_filepath(args):
+
+    # Migrations are assumed to depend only on the metadata and on their own 
+    # source code.
+
+    hasher = hashlib.sha1()
+    hasher.update(json.dumps([consts.version, args.metadata, args.set]).encode('utf-8'))
+
+    if os.path.isdir(args.meta):
+        hasher.update(digest_folder(args.meta).encode('utf-8'))
+    
+    for filepath in args.set_file:
+        hasher.update(digest_file(filepath).encode('utf-8') if os.path.isfile(filepath) else b'missing')
+
+    for _, filepath in get_sorted_script_files(args, args.migrations):
+        hasher.update(os.path.basename(filepath).encode('utf-8'))
+        hasher.update(digest_file(filepath).encode('utf-8'))
+    
+    return os.path.join(args.cache, 'snapshots', meta_group(args), hasher.hexdigest() + '.pickle')
+
+def meta_group(args):
+
+    # Snapshots and checkpoints are grouped by the metadata and --set values 
+    # they were created for, and only the ones of the latest run are kept
+
+    return digest_json([args.metadata, args.set, args.set_file])
+
+def remove_stale_files(folderpath, filepaths):
+
+    if not os.path.isdir(folderpath):
+        return
+    
+    for entry in os.scandir(folderpath):
+        if entry.is_file() and entry.path not in filepaths:
+            debug("  Removing stale cache file", entry.path)
+            os.remove(entry.path)
+
+def load_snapshot(filepath):
+
+    try:
+        with open(filepath, 'rb') as fin:
+            return Meta(pickle.load(fin))
     
-    args = parse_args()
+    except FileNotFoundError:
+        return None
+    
+    except Exception as e:
+        warn(f"Ignoring unreadable snapshot {filepath} - {e}")
+        return None
+
+def save_snapshot(filepath, meta):
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_filepath = filepath + '.tmp'
+
+    with open(tmp_filepath, 'wb') as fout:
+        pickle.dump(unwrap(meta), fout, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    os.replace(tmp_filepath, filepath)
+
+def do_prepare_meta(args):
+
+    if args.snapshot:
+        with profile('metadata', 'load snapshot'):
+            filepath = snapshot_filepath(args)
+            meta = load_snapshot(filepath)
+
+        if meta is not None:
+            info("Loaded the metadata snapshot", filepath)
+            return meta
 
     info("Loading the metadata")
-    meta = do_load_meta(args)
+    with profile('metadata', 'load'):
+        meta = do_load_meta(args)
+    
+    with profile('metadata', 'set'):
+        do_set_values(args, meta)
+    
+    meta = do_migrations(args, meta)
+
+    if args.snapshot:
+        info("Saving the metadata snapshot", filepath)
+        with profile('metadata', 'save snapshot'):
+            save_snapshot(filepath, meta)
+            remove_stale_files(os.path.dirname(filepath), {filepath})
+
+    return meta
+
+def do_actions(args, inflater, meta, archive=None):
+
+    with profile('action', 'clean'):
+        do_clean(args)
+    
+    if archive is None and args.output_archive:
+        archive = do_open_archive(args)
+    
+    if archive is not None:
+        inflater.archive = archive
+
+        try:
+            run_actions(args, inflater, meta)
+        except BaseException:
+            archive.discard()
+            raise
+        finally:
+            inflater.archive = None
+        
+        archive.close()
+        info(f"  Wrote {archive.count} file(s) to {archive.name}")
+
+    else:
+        produced = run_actions(args, inflater, meta)
+        
+        if args.prune:
+            with profile('action', 'prune'):
+                do_prune(args, produced)
+    
+    with profile('action', 'save manifest'):
+        do_save_manifest(args, inflater)
+    
+    with profile('action', 'prune fragments'):
+        do_prune_fragments(args)
+    
+    do_show_summary(args, inflater)
+
+def run_actions(args, inflater, meta):
+
+    # Returns the files produced by each action
+
+    produced = {}
+
+    for name in args.do:
+        first_output = len(inflater.produced)
+
+        with profile('action', name):
+            do_action(name, args, inflater, meta)
+        
+        produced[name] = inflater.produced[first_output:]
+    
+    return produced
+
+def check_archive_args(args, target):
+
+    # Archives are always written from scratch, so there are no previous outputs 
+    # to compare with.
+
+    for name in ['incremental', 'sync', 'only_changed', 'watch']:
+        if getattr(args, name):
+            error(f"{target} can't be combined with --{name.replace('_', '-')}")
+
+def do_open_archive(args):
+
+    check_archive_args(args, '--output-archive')
+    
+    try:
+        return ArchiveWriter(args.output_archive)
+    except (OSError, ValueError) as e:
+        error(f"Could not create the archive {args.output_archive} - {e}")
+
+def load_matrix(args):
+
+    try:
+        with open(args.matrix, 'r') as fin:
+            entries = json.loads(fin.read())
+    except (OSError, ValueError) as e:
+        error(f"Could not read the matrix file {args.matrix} - {e}")
+    
+    if isinstance(entries, dict):
+        entries = [entries]
+    
+    jobs = []
+
+    for entry in entries:
+        styles = entry.get('styles', entry.get('style', args.style))
+        metadata = entry.get('metadata', args.metadata)
+        pattern = entry.get('output', os.path.join(args.output, '{style}', '{metadata}'))
+
+        styles = [styles] if isinstance(styles, str) else styles
+        metadata = [metadata] if isinstance(metadata, str) else metadata
+
+        for style in styles:
+            for metadata_names in metadata:
+                output = pattern.format(style=os.path.basename(os.path.normpath(style)), metadata=metadata_names)
+                jobs.append(derive_args(args, style=style, metadata=[metadata_names], output=output, matrix=None))
+    
+    # Keeping the jobs of a style together lets each worker reuse its inflater
+
+    jobs.sort(key=lambda x: x.style)
+    return jobs
+
+def run_matrix_job(args, inflaters):
+
+    info(f"Generating {args.style} + {','.join(args.metadata)} -> {args.output}")
+
+    meta = do_prepare_meta(args)
+
+    if args.style in inflaters:
+        inflater = inflaters[args.style]
+        inflater.rebind(args)
+    else:
+        inflater = inflaters[args.style] = do_load_inflater(args)
+    
+    do_actions(args, inflater, meta)
+
+def init_matrix_worker(log_level):
+    
+    global WORKER, LOG_LEVEL
+
+    LOG_LEVEL = log_level
+    WORKER = {}
+
+def run_matrix_worker(args):
+
+    try:
+        run_matrix_job(args, WORKER)
+        return None
+    except MellError as e:
+        show_error(e)
+        return ''
+    except Exception:
+        return format_exception()
+
+def do_matrix(args):
+
+    jobs = load_matrix(args)
+    info(f"Executing {len(jobs)} matrix job(s)")
+
+    if args.jobs > 1 and len(jobs) > 1:
+
+        # Jobs already run in parallel, so each one renders its templates serially
+        
+        jobs = [derive_args(job, jobs=1) for job in jobs]
+        workers = min(args.jobs, len(jobs))
+        chunksize = max(1, len(jobs) // (workers * 2))
+
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_matrix_worker, initargs=(LOG_LEVEL,)) as executor:
+            failures = list(executor.map(run_matrix_worker, jobs, chunksize=chunksize))
+        
+        failed = [(job, failure) for job, failure in zip(jobs, failures) if failure is not None]
+
+        for job, failure in failed:
+            print(failure, file=sys.stderr, end='')
+        
+        if failed:
+            error("Failed matrix job(s):", ', '.join(f"{job.style} + {','.join(job.metadata)}" for job, _ in failed))
+    
+    else:
+        inflaters = {}
+        for job in jobs:
+            run_matrix_job(job, inflaters)
+
+def fingerprint_folders(folderpaths):
+
+    # Cheap digest of the size and modification time of every file inside the 
+    # folders, used to notice changes between server requests
+
+    parts = []
+
+    for folderpath in folderpaths:
+        for relpath in walk_folder(folderpath):
+            try:
+                stat = os.stat(os.path.join(folderpath, relpath))
+                parts.append(f"{folderpath}:{relpath}:{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                pass
+    
+    return digest_text('\n'.join(parts))
+
+
+class RenderServer:
+
+    # Renders templates on request, keeping the prepared metadata and the 
+    # compiled templates of each style in memory. Each line received is a JSON 
+    # request, answered by a JSON line:
+    #
+    #   {"metadata": "en", "style": "style2", "set": [["user.name", "Ana"]], 
+    #    "templates": ["index.html"], "output": "preview"}
+    #   {"meta": {"inline": "metadata"}, "templates": ["index.html"]}
+    #   {"op": "status"}
+    #   {"op": "invalidate"}
+    #
+    # Without output, the rendered text of each template is returned in files.
+    
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.metas = {}
+        self.inflaters = {}
+        self.stats = {'requests': 0, 'failures': 0, 'meta_hits': 0, 'meta_misses': 0, 'style_hits': 0, 'style_misses': 0}
+    
+    def handle(self, request):
+
+        start = time.perf_counter()
+
+        try:
+            if not isinstance(request, dict):
+                raise MellError("expected a JSON object")
+            
+            op = request.get('op', 'render')
+
+            if op == 'render':
+                response = self.render(request)
+            elif op == 'status':
+                response = self.status()
+            elif op == 'invalidate':
+                response = self.invalidate()
+            else:
+                raise MellError(f"unknown operation '{op}'")
+            
+            response['ok'] = True
+        
+        except Exception as e:
+            response = {'ok': False, 'error': str(e) if isinstance(e, MellError) else format_exception()}
+
+            with self.lock:
+                self.stats['failures'] += 1
+        
+        with self.lock:
+            self.stats['requests'] += 1
+        
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        
+        response['elapsed'] = time.perf_counter() - start
+        return response
+    
+    def render(self, request):
+
+        overrides = {}
+
+        if 'metadata' in request:
+            metadata = request['metadata']
+            overrides['metadata'] = [metadata] if isinstance(metadata, str) else list(metadata)
+        
+        if 'style' in request:
+            overrides['style'] = request['style']
+        
+        if 'set' in request:
+            overrides['set'] = self.args.set + [list(x) for x in request['set']]
+        
+        if 'output' in request:
+            overrides['output'] = request['output']
+        
+        args = derive_args(self.args, **overrides) if overrides else self.args
+        meta, meta_status = self.prepare_meta(args, request.get('meta'))
+        inflater, style_status = self.get_inflater(args)
+
+        if 'templates' in request:
+            relpaths = list(request['templates'])
+        else:
+            SCANS.pop((args.style, args.templates), None)
+            relpaths = list_template_files(args)
+        
+        response = {'cache': {'meta': meta_status, 'style': style_status}}
+
+        if 'output' in request:
+            for relpath in relpaths:
+                inflater.inflate(relpath, meta, to_file=relpath, from_asset=False)
+            response['written'] = inflater.produced
+        
+        else:
+            response['files'] = {relpath: inflater.inflate(relpath, meta, from_asset=False) for relpath in relpaths}
+        
+        return response
+    
+    def prepare_meta(self, args, inline):
+
+        # Inline metadata goes through --set and the migrations on every request. 
+        # Named metadata is prepared again only when the files change.
+
+        if inline is not None:
+            meta = Meta(copy_json(inline))
+            do_set_values(args, meta)
+            return do_migrations(args, meta), 'inline'
+
+        key = json.dumps([args.metadata, args.meta, args.migrations, args.set, args.set_file])
+        fingerprint = fingerprint_folders([args.meta, args.migrations])
+
+        with self.lock:
+            cached = self.metas.get(key)
+
+            if cached is not None and cached[0] == fingerprint:
+                self.stats['meta_hits'] += 1
+                status = 'hit'
+            else:
+                SCANS.pop((args.style, args.migrations), None)
+                cached = self.metas[key] = (fingerprint, do_prepare_meta(args).value)
+                self.stats['meta_misses'] += 1
+                status = 'miss'
+        
+        return Meta(copy_json(cached[1])), status
+    
+    def get_inflater(self, args):
+
+        # The compiled templates are kept while the style changes, but what is 
+        # derived from it, like the digests used by the cache tag, is not
+
+        key = (args.templates, args.assets)
+        fingerprint = fingerprint_folders([args.templates, args.assets])
+
+        with self.lock:
+            cached = self.inflaters.get(key)
+
+            if cached is None:
+                cached = self.inflaters[key] = (fingerprint, Inflater(args))
+                self.stats['style_misses'] += 1
+                status = 'miss'
+            else:
+                if cached[0] != fingerprint:
+                    cached[1].invalidate()
+                    cached = self.inflaters[key] = (fingerprint, cached[1])
+                
+                self.stats['style_hits'] += 1
+                status = 'hit'
+            
+            return cached[1].fork(args), status
+    
+    def status(self):
+
+        with self.lock:
+            return {
+                'stats': dict(self.stats),
+                'metadata': len(self.metas),
+                'styles': len(self.inflaters),
+                'templates': sum(len(env.cache) for _, inflater in self.inflaters.values() for env in inflater.envs.values() if env is not None and env.cache is not None)
+            }
+    
+    def invalidate(self):
+
+        with self.lock:
+            self.metas = {}
+            SCANS.clear()
+
+            for _, inflater in self.inflaters.values():
+                inflater.invalidate()
+        
+        return {}
+
+def do_serve(args):
+
+    import concurrent.futures
+    import socketserver
+
+    check_archive_args(args, '--serve')
+
+    server = RenderServer(args)
+    pool = concurrent.futures.ThreadPoolExecutor(max(1, args.jobs))
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {'ok': False, 'error': f"Invalid JSON - {e}"}
+                else:
+                    response = pool.submit(server.handle, request).result()
+                
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+    
+    # Only a socket left by a previous server is replaced
+
+    if os.path.exists(args.serve):
+        if not is_socket(args.serve):
+            error(f"{args.serve} already exists and is not a socket")
+        os.remove(args.serve)
+    
+    info(f"Serving on {args.serve} with {max(1, args.jobs)} worker(s), press Ctrl+C to stop")
+
+    try:
+        with Server(args.serve, Handler) as listener:
+            listener.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+        if is_socket(args.serve):
+            os.remove(args.serve)
+
+def is_socket(filepath):
+    try:
+        return stat.S_ISSOCK(os.stat(filepath).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class Build:
+
+    # The outcome of Project.build. When rendered into memory, files maps each 
+    # output path to its content, as bytes.
+
+    def __init__(self, args, inflater, output, elapsed):
+        self.args = args
+        self.produced = list(inflater.produced)
+        self.rewritten = inflater.rewritten
+        self.unchanged = inflater.unchanged
+        self.files = output.files if output is not None else None
+        self.elapsed = elapsed
+    
+    def read(self, relpath):
+        
+        if self.files is not None:
+            data = self.files[relpath]
+        else:
+            with open(os.path.join(self.args.output, relpath), 'rb') as fin:
+                data = fin.read()
+        
+        return data.decode(locale.getpreferredencoding(False)).replace(os.linesep, '\n')
+
+
+class Project:
+
+    # Runs mell in process. Options are the same as the command line ones, named 
+    # as in the args namespace (style, output, set, do, jobs, incremental, ...), 
+    # and may be replaced per build. Prepared metadata and inflaters are kept 
+    # between builds. Failures raise MellError.
+
+    def __init__(self, root='.', **options):
+
+        args = create_parser().parse_args([])
+        args.root = root
+
+        for name, value in options.items():
+            check_option(args, name)
+            setattr(args, name, value)
+        
+        self.args = finish_args(args)
+        self._metas = {}
+        self._inflaters = {}
+    
+    def options(self, metadata=None, **overrides):
+
+        for name in overrides:
+            check_option(self.args, name)
+
+        if metadata is not None:
+            overrides['metadata'] = [metadata] if isinstance(metadata, str) else list(metadata)
+        
+        return derive_args(self.args, **overrides) if overrides else self.args
     
-    do_set_values(args, meta)
-    do_migrations(args, meta)
+    def load_meta(self, metadata=None, **overrides):
+
+        # Returns a copy of the metadata after --set and the migrations, which are 
+        # executed once per combination of inputs
+
+        args = self.options(metadata, **overrides)
+        key = json.dumps([args.metadata, args.meta, args.migrations, args.set, args.set_file])
+
+        if key not in self._metas:
+            self._metas[key] = do_prepare_meta(args).value
+        
+        return Meta(copy_json(self._metas[key]))
+    
+    def inflater(self, metadata=None, **overrides):
+
+        args = self.options(metadata, **overrides)
+        key = (args.templates, args.assets, args.bytecode_cache, args.frozen, args.template_cache_size, args.fragment_cache, args.fragment_cache_size, digest_json([args.block_start, args.block_end, args.variable_start, args.variable_end, args.comment_start, args.comment_end]))
+
+        if key in self._inflaters:
+            inflater = self._inflaters[key]
+            inflater.rebind(args)
+        else:
+            inflater = self._inflaters[key] = Inflater(args)
+        
+        return inflater
+    
+    def build(self, metadata=None, to_memory=False, **overrides):
+
+        args = self.options(metadata, **overrides)
+        start = time.perf_counter()
+        output = None
+
+        if to_memory:
+            check_archive_args(args, 'Rendering into memory')
+            output = MemoryOutput()
+
+        meta = self.load_meta(args.metadata, **overrides)
+        inflater = self.inflater(args.metadata, **overrides)
+        do_actions(args, inflater, meta, output)
+
+        return Build(args, inflater, output, time.perf_counter() - start)
+    
+    def invalidate(self):
+
+        # Forgets the prepared metadata and everything derived from the style 
+        # files, after they change
+
+        self._metas = {}
+
+        for inflater in self._inflaters.values():
+            inflater.invalidate()
+
+def check_option(args, name):
+    if not hasattr(args, name):
+        raise TypeError(f"Unknown option: {name}")
+
+def run(args):
+    
+    global PROFILER
+
+    if args.profile:
+        PROFILER = Profiler()
+
+    if args.matrix:
+        do_matrix(args)
+        do_show_profile(args)
+        info("Bye!")
+        return
+    
+    if args.serve:
+        do_serve(args)
+        info("Bye!")
+        return
+
+    meta = do_prepare_meta(args)
 
     do_show_metadata(args, meta)
     do_show_parameters(args)
 
     info("Loading the inflater")
-    inflater = do_load_inflater(args)
+    with profile('inflater', 'load'):
+        inflater = do_load_inflater(args)
+    
+    pristine = copy.deepcopy(meta.value) if args.watch else None
 
     info("Executing actions")
-    do_clean(args)
-    for name in args.do:
-        do_action(name, args, inflater, meta)
+    do_actions(args, inflater, meta)
+    do_show_profile(args)
+    do_watch(args, inflater, pristine)
 
     info("Bye!")
 
+def main(*params):
+
+    try:
+        run(parse_args())
+    except MellError as e:
+        show_error(e)
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -32,7 +32,7 @@ setuptools.setup(
         'jinja2'
     ],
     extras_require={
-        "full": []
+        "full": ["inotify_simple"]
     }
 )
 
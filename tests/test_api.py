@@ -0,0 +1,93 @@
+from utils import MellHelper
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mell import Project, MellError
+
+
+def test_api_build():
+
+    p = MellHelper('api_build')
+    p.create_project()
+    p.create_metadata('en', '{"greeting": "Hello"}')
+    p.create_metadata('pt', '{"greeting": "Ola"}')
+    p.create_template('index.txt', '|= meta.greeting =|, |= meta.name =|!')
+    p.create_static('logo.txt', 'logo')
+
+    project = Project(p.root_path, set=[['name', 'Ana']])
+
+    build = project.build('en', to_memory=True)
+
+    assert sorted(build.files) == ['index.txt', 'logo.txt']
+    assert build.read('index.txt') == 'Hello, Ana!'
+    assert build.rewritten == 1
+    assert p.list_output_files() == []
+
+    # Options may be replaced per build, the inflater is reused
+    output_path = os.path.join(p.root_path, 'output_pt')
+    build = project.build('pt', output=output_path, do=['templates'])
+
+    assert build.files is None
+    assert build.produced == ['index.txt']
+    assert build.read('index.txt') == 'Ola, Ana!'
+    assert project.inflater('pt') is project.inflater('en')
+
+    # The metadata is prepared once and each build receives a copy
+    meta = project.load_meta('en')
+    meta.greeting = 'Changed'
+    assert project.load_meta('en').greeting == 'Hello'
+
+def test_api_errors():
+
+    p = MellHelper('api_errors')
+    p.create_project()
+
+    with pytest.raises(TypeError):
+        Project(p.root_path, unknown_option=1)
+
+    with pytest.raises(MellError, match='Folder meta does not exist'):
+        Project(p.root_path, meta=os.path.join(p.root_path, 'missing')).build('en', to_memory=True)
+
+    with pytest.raises(MellError, match="can't be combined with --incremental"):
+        Project(p.root_path, incremental=True).build(to_memory=True)
+
+def test_api_meta_copies():
+
+    p = MellHelper('api_meta_copies')
+    p.create_project()
+    p.create_metadata('base', '{"users": {"a": "Ana"}}')
+    p.create_metadata('child/__parent__', '"base"')
+    p.create_metadata('child/users', '{"b": "Bia"}')
+
+    project = Project(p.root_path)
+
+    # Properties merged from lazy fragments must not be shared between copies
+    meta = project.load_meta('child')
+    meta.users['c'] = 'Leak'
+
+    assert project.load_meta('child').users.value == {'a': 'Ana', 'b': 'Bia'}
+
+def test_api_style_changes():
+
+    p = MellHelper('api_style_changes')
+    p.create_project()
+    p.create_metadata('d', '{"name": "Ana"}')
+    p.create_template('a.txt', 'a |= meta.name =|')
+
+    project = Project(p.root_path, incremental=True)
+    build = project.build('d')
+
+    assert build.produced == ['a.txt']
+
+    # Each build sees the style as it is, without calling invalidate
+    p.create_template('a.txt', 'A |= meta.name =|')
+    p.create_template('b.txt', 'b |= meta.name =|')
+    build = project.build('d')
+
+    assert sorted(build.produced) == ['a.txt', 'b.txt']
+    assert build.unchanged == 0
+    assert p.read_output_file('a.txt') == 'A Ana'
@@ -0,0 +1,61 @@
+from utils import MellHelper, unindent
+
+import tarfile
+import zipfile
+import os
+
+
+def create_archive_project(name):
+
+    generator_script = unindent(8, """
+        def generate(args, meta, inflater):
+            for i, user in enumerate(meta.users):
+                inflater.inflate('user.txt', user, to_file=f'users/{i}.txt')
+        """)
+
+    p = MellHelper(name)
+    p.create_project()
+    p.create_metadata('data', '{"users": [{"name": "Ana"}, {"name": "Bia"}]}')
+    p.create_template('index.txt', '|? for user in meta.users ?||= user.name =| |? endfor ?|')
+    p.create_template('about/team.txt', 'team')
+    p.create_asset('user.txt', 'User |= meta.name =|')
+    p.create_static('css/style.css', 'body {}')
+    p.create_generator('users', generator_script)
+
+    return p
+
+def test_output_tar_archive():
+
+    p = create_archive_project('output_tar_archive')
+    archive_path = os.path.join(p.root_path, 'site.tar.gz')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --jobs 2 --output-archive {archive_path} data')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.list_output_files() == []
+
+    with tarfile.open(archive_path) as tar:
+        assert sorted(tar.getnames()) == ['about/team.txt', 'css/style.css', 'index.txt', 'users/0.txt', 'users/1.txt']
+        assert tar.extractfile('index.txt').read() == b'Ana Bia '
+        assert tar.extractfile('users/1.txt').read() == b'User Bia'
+        assert tar.extractfile('css/style.css').read() == b'body {}'
+
+def test_output_zip_archive():
+
+    p = create_archive_project('output_zip_archive')
+    archive_path = os.path.join(p.root_path, 'site.zip')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --output-archive {archive_path} data')
+
+    assert status == 0
+    assert stderr == ''
+
+    with zipfile.ZipFile(archive_path) as archive:
+        assert sorted(archive.namelist()) == ['about/team.txt', 'css/style.css', 'index.txt', 'users/0.txt', 'users/1.txt']
+        assert archive.read('users/0.txt') == b'User Ana'
+    
+    status, stdout, _ = p.exec(f'--root {p.root_path} --output-archive {archive_path} --incremental data')
+
+    assert status == 1
+    assert "can't be combined with --incremental" in stdout
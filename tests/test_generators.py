@@ -60,3 +60,68 @@ def test_generators():
     assert p.read_output_file('project_0.txt') == project_0
     assert p.read_output_file('project_1.txt') == project_1
     assert p.read_output_file('project_2.txt') == project_2
+
+def test_isolated_generators():
+
+    generator_script = unindent(8, """
+        def generate(args, meta, inflater):
+            print('Generating', meta.name)
+            inflater.inflate('name.txt', meta, to_file='{name}.txt')
+        """)
+
+    mutating_script = unindent(8, """
+        def generate(args, meta, inflater):
+            meta.name = 'changed'
+        """)
+
+    p = MellHelper('isolated_generators')
+    p.create_project()
+    p.create_metadata('data', '{"name": "Gold"}')
+    p.create_asset('name.txt', 'Name: |= meta.name =|')
+
+    for name in ['a', 'b', 'c']:
+        p.create_generator(name, generator_script.replace('{name}', name))
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --isolated-generators --jobs 2 data')
+
+    assert status == 0
+    assert stderr == ''
+    assert stdout == 'Generating Gold\n' * 3
+    assert p.list_output_files() == ['a.txt', 'b.txt', 'c.txt']
+    assert p.read_output_file('b.txt') == 'Name: Gold'
+
+    # Generators only receive a read-only view of the metadata
+    p.create_generator('d', mutating_script)
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --isolated-generators --jobs 2 data')
+
+    assert status == 1
+    assert 'read-only' in stderr
+    assert 'Failed to execute the generator(s): generators.d.py' in stdout
+
+def test_isolated_generators_copies():
+
+    writer_script = unindent(8, """
+        def generate(args, meta, inflater):
+            meta.value['seen'] = 'a'
+            meta.value['users'].append('Bia')
+        """)
+
+    reader_script = unindent(8, """
+        def generate(args, meta, inflater):
+            print('b sees', meta.value.get('seen'), len(meta.users))
+        """)
+
+    p = MellHelper('isolated_generators_copies')
+    p.create_project()
+    p.create_metadata('data', '{"users": ["Ana"]}')
+    p.create_generator('a', writer_script)
+    p.create_generator('b', reader_script)
+
+    # Changes made through meta.value do not reach the next generator, whatever 
+    # the number of workers
+    for jobs in [1, 2]:
+        status, stdout, stderr = p.exec(f'--root {p.root_path} --isolated-generators --jobs {jobs} data')
+
+        assert status == 0
+        assert stderr == ''
+        assert stdout == 'b sees None 1\n'
@@ -0,0 +1,179 @@
+from utils import MellHelper, unindent
+
+import os
+
+
+def test_incremental_templates():
+
+    meta_name = 'data'
+    
+    p = MellHelper('incremental_templates')
+    p.create_project()
+    p.create_metadata(meta_name, '{"a": "one", "b": "two"}')
+    p.create_template('a.txt', '|= meta.a =|')
+    p.create_template('b.txt', '|? include "partial.txt" ?|')
+    p.create_template('partial.txt', '|= meta.b =|')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('a.txt') == 'one'
+    assert p.read_output_file('b.txt') == 'two'
+    assert os.path.exists(os.path.join(p.output_path, '.mell-manifest.json'))
+
+    # Unchanged inputs must not touch the outputs
+    p.write_output_file('a.txt', 'edited')
+    p.write_output_file('b.txt', 'edited')
+    status, _, _ = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('a.txt') == 'edited'
+    assert p.read_output_file('b.txt') == 'edited'
+
+    # Changing an included template rerenders the files including it
+    p.create_template('partial.txt', '[|= meta.b =|]')
+    status, _, _ = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('a.txt') == 'edited'
+    assert p.read_output_file('b.txt') == '[two]'
+
+    # Changing the metadata rerenders everything that reads it
+    p.create_metadata(meta_name, '{"a": "three", "b": "two"}')
+    status, _, _ = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('a.txt') == 'three'
+    assert p.read_output_file('b.txt') == '[two]'
+
+def test_incremental_nested_assets():
+
+    p = MellHelper('incremental_nested_assets')
+    p.create_project()
+    p.create_metadata('data', '{"name": "page"}')
+    p.create_template('page.txt', '|= meta.name =|: |= inflater.inflate("card.txt", meta) =|')
+    p.create_template('other.txt', '|= meta.name =|')
+    p.create_asset('card.txt', 'card v1')
+
+    for version in ['v1', 'v2']:
+        p.create_asset('card.txt', f'card {version}')
+        p.write_output_file('other.txt', 'edited')
+        status, _, stderr = p.exec(f'--root {p.root_path} --incremental data')
+
+        assert status == 0
+        assert stderr == ''
+        assert p.read_output_file('page.txt') == f'page: card {version}'
+        assert p.read_output_file('other.txt') == ('page' if version == 'v1' else 'edited')
+
+def test_incremental_generators():
+
+    meta_name = 'data'
+
+    generator_script = unindent(8, """
+        def generate(args, meta, inflater):
+            for i, name in enumerate(meta.names):
+                inflater.inflate('name.txt', name, to_file=f'name_{i}.txt')
+        """)
+    
+    p = MellHelper('incremental_generators')
+    p.create_project()
+    p.create_metadata(meta_name, '{"names": ["Ana", "Bia"]}')
+    p.create_generator('names', generator_script)
+    p.create_asset('name.txt', 'Hi |= meta =|')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('name_0.txt') == 'Hi Ana'
+    assert p.read_output_file('name_1.txt') == 'Hi Bia'
+
+    p.write_output_file('name_0.txt', 'edited')
+    p.write_output_file('name_1.txt', 'edited')
+    p.create_metadata(meta_name, '{"names": ["Ana", "Carla"]}')
+    status, _, _ = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('name_0.txt') == 'edited'
+    assert p.read_output_file('name_1.txt') == 'Hi Carla'
+
+    # A missing manifest falls back to a full rebuild
+    os.remove(os.path.join(p.output_path, '.mell-manifest.json'))
+    status, _, _ = p.exec(f'--root {p.root_path} --incremental {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('name_0.txt') == 'Hi Ana'
+
+def test_incremental_trace():
+
+    meta_name = 'data'
+
+    generator_script = unindent(8, """
+        def generate(args, meta, inflater):
+            for i, user in enumerate(meta.users):
+                inflater.inflate('user.txt', user, to_file=f'user_{i}.txt')
+        """)
+    
+    p = MellHelper('incremental_trace')
+    p.create_project()
+    p.create_metadata(meta_name, '{"title": "Users", "users": [{"name": "Ana", "age": 30}, {"name": "Bia", "age": 40}]}')
+    p.create_generator('users', generator_script)
+    p.create_asset('user.txt', 'Hi |= meta.name =|')
+    p.create_template('title.txt', '|= meta.title =|')
+    p.create_template('count.txt', '|= meta.users|length =|')
+    p.create_template('third.txt', '|= meta.users[2] is defined =|')
+
+    outputs = ['title.txt', 'count.txt', 'third.txt', 'user_0.txt', 'user_1.txt']
+
+    def run_and_edit(metadata):
+        p.create_metadata(meta_name, metadata)
+        status, _, stderr = p.exec(f'--root {p.root_path} --trace {meta_name}')
+        assert status == 0
+        assert stderr == ''
+        result = {relpath: p.read_output_file(relpath) for relpath in p.list_output_files()}
+        for relpath in outputs:
+            p.write_output_file(relpath, 'edited')
+        return result
+
+    result = run_and_edit('{"title": "Users", "users": [{"name": "Ana", "age": 30}, {"name": "Bia", "age": 40}]}')
+    assert result == {'title.txt': 'Users', 'count.txt': '2', 'third.txt': 'False', 'user_0.txt': 'Hi Ana', 'user_1.txt': 'Hi Bia'}
+
+    # Nothing reads the age
+    result = run_and_edit('{"title": "Users", "users": [{"name": "Ana", "age": 31}, {"name": "Bia", "age": 40}]}')
+    assert result == {relpath: 'edited' for relpath in outputs}
+
+    result = run_and_edit('{"title": "Users", "users": [{"name": "Ana", "age": 31}, {"name": "Carla", "age": 40}]}')
+    assert result == {'title.txt': 'edited', 'count.txt': 'edited', 'third.txt': 'edited', 'user_0.txt': 'edited', 'user_1.txt': 'Hi Carla'}
+
+    result = run_and_edit('{"title": "Users", "users": [{"name": "Ana", "age": 31}, {"name": "Carla", "age": 40}, {"name": "Duda"}]}')
+    # A missing index read before is rendered again once it exists
+    assert result == {'title.txt': 'edited', 'count.txt': '3', 'third.txt': 'True', 'user_0.txt': 'edited', 'user_1.txt': 'edited', 'user_2.txt': 'Hi Duda'}
+
+def test_prune():
+
+    p = MellHelper('prune')
+    p.create_project()
+    p.create_metadata('data', '{"name": "Gold"}')
+    p.create_template('a.txt', 'a')
+    template_b = p.create_template('nested/b.txt', 'b')
+    static = p.create_static('logo.txt', 'logo')
+
+    status, _, _ = p.exec(f'--root {p.root_path} --prune data')
+    assert status == 0
+
+    p.write_output_file('manual.txt', 'not produced by mell')
+    os.remove(template_b)
+    os.remove(static)
+
+    # Only the outputs of the executed actions are pruned
+    status, _, _ = p.exec(f'--root {p.root_path} --prune --do templates data')
+
+    assert status == 0
+    assert p.list_output_files() == ['a.txt', 'logo.txt', 'manual.txt']
+    assert not os.path.exists(os.path.join(p.output_path, 'nested'))
+
+    status, _, _ = p.exec(f'--root {p.root_path} --prune data')
+
+    assert status == 0
+    assert p.list_output_files() == ['a.txt', 'manual.txt']
@@ -0,0 +1,38 @@
+from utils import MellHelper
+
+import json
+import os
+
+
+def test_matrix():
+
+    p = MellHelper('matrix')
+    p.create_project()
+    p.create_metadata('en', '{"hello": "Hello"}')
+    p.create_metadata('pt', '{"hello": "Ola"}')
+    p.create_template('hello.txt', '|= meta.hello =| from style')
+
+    assert p.exec(f'--root {p.root_path} --new-style style2')[0] == 0
+    p.set_style('style2')
+    p.create_template('hello.txt', '|= meta.hello =| from style2')
+
+    matrix_filepath = os.path.join(p.root_path, 'matrix.json')
+    output_pattern = os.path.join(p.output_path, '{style}', '{metadata}')
+    styles = [os.path.join(p.root_path, 'style'), os.path.join(p.root_path, 'style2')]
+
+    with open(matrix_filepath, 'w') as fout:
+        fout.write(json.dumps({'styles': styles, 'metadata': ['en', 'pt'], 'output': output_pattern}))
+
+    for jobs in [1, 3]:
+        p.clean_output()
+        status, stdout, stderr = p.exec(f'--root {p.root_path} --matrix {matrix_filepath} --jobs {jobs}')
+
+        assert status == 0
+        assert stderr == ''
+        assert stdout == ''
+
+        assert p.list_output_files() == ['style/en/hello.txt', 'style/pt/hello.txt', 'style2/en/hello.txt', 'style2/pt/hello.txt']
+        assert p.read_output_file('style/en/hello.txt') == 'Hello from style'
+        assert p.read_output_file('style/pt/hello.txt') == 'Ola from style'
+        assert p.read_output_file('style2/en/hello.txt') == 'Hello from style2'
+        assert p.read_output_file('style2/pt/hello.txt') == 'Ola from style2'
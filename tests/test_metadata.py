@@ -1,6 +1,8 @@
-
 from utils import MellHelper, unindent
 
+import json
+import os
+
 
 def test_load_metadata():
 
@@ -97,3 +99,98 @@ def test_metadata_set():
     assert stderr == ''
     assert stdout == expected_output
 
+
+def test_metadata_diamond_inheritance():
+
+    expected_output = unindent(8, """
+        Metadata:
+        {
+          "name": "top",
+          "base": true,
+          "tags": [
+            "right"
+          ],
+          "__parent__": "left right",
+          "left": true,
+          "right": true
+        }
+        """)
+
+    p = MellHelper('metadata_diamond')
+    p.create_project()
+    p.create_metadata('base', '{"name": "base", "base": true, "tags": ["base"]}')
+    p.create_metadata('left', '{"__parent__": "base", "name": "left", "left": true, "tags": ["left"]}')
+    p.create_metadata('right', '{"__parent__": "base", "name": "right", "right": true, "tags": ["right"]}')
+    p.create_metadata('top', '{"__parent__": "left right", "name": "top"}')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --show-metadata top')
+
+    assert status == 0
+    assert stderr == ''
+    assert stdout == expected_output
+
+def test_metadata_inheritance_cycle():
+
+    p = MellHelper('metadata_cycle')
+    p.create_project()
+    p.create_metadata('a', '{"__parent__": "b"}')
+    p.create_metadata('b', '{"__parent__": "c"}')
+    p.create_metadata('c', '{"__parent__": "a"}')
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} --show-metadata a')
+
+    assert status == 1
+    assert stdout == 'ERROR: Cyclic __parent__ reference in metadata: a -> b -> c -> a\n'
+
+def test_metadata_fragments():
+
+    template = unindent(8, """
+        |= meta.title =| |= meta.settings.theme =| |= meta.settings.size =| |= meta.users|length =|
+        |? for user in meta.users ?||= user.name =| |? endfor ?|
+        """)
+
+    p = MellHelper('metadata_fragments')
+    p.create_project()
+    p.create_metadata('base', '{"title": "Base", "settings": {"theme": "dark", "size": 1}}')
+    p.create_metadata('big/__parent__', '"base"')
+    p.create_metadata('big/users', '[{"name": "Ana"}, {"name": "Bia"}]')
+    p.create_metadata('big/settings/theme', '"light"')
+    p.create_metadata('big/unused', '{ this fragment is never loaded')
+    p.create_template('out.txt', template)
+
+    status, _, stderr = p.exec(f'--root {p.root_path} big --set settings.size 2')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('out.txt') == 'Base light 2 2\nAna Bia '
+
+def test_metadata_set_file():
+
+    p = MellHelper('metadata_set_file')
+    p.create_project()
+    p.create_metadata('data', '{"user": {"name": "Ana", "tags": ["a", "b"]}, "old": 1}')
+
+    overrides_path = os.path.join(p.root_path, 'overrides.ndjson')
+    patch_path = os.path.join(p.root_path, 'patch.json')
+
+    with open(overrides_path, 'w') as fout:
+        fout.write('{"user.name": "Bia", "user.address.city": "Natal"}\n')
+        fout.write('{"user.tags[3]": "d", "count": 3}\n')
+    
+    with open(patch_path, 'w') as fout:
+        fout.write(json.dumps([
+            {"op": "test", "path": "/user/name", "value": "Bia"},
+            {"op": "add", "path": "/user/tags/0", "value": "first"},
+            {"op": "move", "from": "/old", "path": "/new"},
+            {"op": "remove", "path": "/user/tags/3"}
+        ]))
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --set-file {overrides_path} --set-file {patch_path} --show-metadata --do nothing data --set user.active false bool')
+
+    assert status == 0
+    assert stderr == ''
+    assert json.loads(stdout.split('\n', 1)[1]) == {
+        "user": {"name": "Bia", "tags": ["first", "a", "b", "d"], "address": {"city": "Natal"}, "active": False},
+        "count": 3,
+        "new": 1
+    }
@@ -1,6 +1,10 @@
 
 from utils import MellHelper, unindent
 
+import json
+import glob
+import os
+
 
 def test_migrations():
 
@@ -51,3 +55,84 @@ def test_migrations():
     assert status == 0
     assert stderr == ''
     assert stdout == expected_output
+
+def test_metadata_snapshot():
+
+    migration_script = unindent(8, """
+        def migrate(args, meta):
+            meta.runs = meta.runs + 1
+        """)
+
+    def show_runs(p):
+        status, stdout, stderr = p.exec(f'--root {p.root_path} --snapshot --show-metadata --do nothing users')
+        assert status == 0
+        assert stderr == ''
+        return json.loads(stdout.split('\n', 1)[1])['runs']
+
+    p = MellHelper('metadata_snapshot')
+    p.create_project()
+    p.create_metadata('users', '{"runs": 0}')
+    filepath = p.create_migration('count_runs', migration_script)
+
+    # The migration only runs again when one of the inputs change
+    assert show_runs(p) == 1
+    assert show_runs(p) == 1
+
+    p.create_metadata('users', '{"runs": 10}')
+    assert show_runs(p) == 11
+
+    with open(filepath, 'w') as fout:
+        fout.write(migration_script.replace('+ 1', '+ 2'))
+    
+    assert show_runs(p) == 12
+    assert show_runs(p) == 12
+
+    # Only the latest snapshot of each metadata is kept
+    assert len(glob.glob(os.path.join(p.root_path, '.mell', 'snapshots', '*', '*'))) == 1
+
+def test_migration_checkpoints():
+
+    def migration_script(name, increment):
+        return unindent(12, f"""
+            import os
+
+            def migrate(args, meta):
+                with open(os.path.join(args.root, 'runs.txt'), 'a') as fout:
+                    fout.write('{name}\\n')
+                meta.total = meta.total + {increment}
+            """)
+
+    def run(p):
+        status, stdout, stderr = p.exec(f'--root {p.root_path} --checkpoints --show-metadata --do nothing users')
+        assert status == 0
+        assert stderr == ''
+        return json.loads(stdout.split('\n', 1)[1])['total']
+
+    def read_runs(p):
+        filepath = os.path.join(p.root_path, 'runs.txt')
+        with open(filepath) as fin:
+            runs = fin.read().split()
+        os.remove(filepath)
+        return runs
+
+    p = MellHelper('migration_checkpoints')
+    p.create_project()
+    p.create_metadata('users', '{"total": 0}')
+    p.create_migration('first', migration_script('first', 1))
+    filepath = p.create_migration('second', migration_script('second', 10))
+
+    assert run(p) == 11
+    assert read_runs(p) == ['first', 'second']
+
+    # Only the migrations from the first changed one onward are executed
+    with open(filepath, 'w') as fout:
+        fout.write(migration_script('second', 100))
+
+    assert run(p) == 101
+    assert read_runs(p) == ['second']
+
+    assert run(p) == 101
+    assert not os.path.exists(os.path.join(p.root_path, 'runs.txt'))
+
+    # Checkpoints out of the current chain are removed
+    assert len(glob.glob(os.path.join(p.root_path, '.mell', 'checkpoints', '*', '*'))) == 2
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+from utils import MellHelper, wait_for
+
+import socket
+import json
+import os
+
+
+def send_requests(socket_path, *requests):
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        stream = client.makefile('rwb')
+
+        responses = []
+
+        for request in requests:
+            stream.write(json.dumps(request).encode('utf-8') + b'\n')
+            stream.flush()
+            responses.append(json.loads(stream.readline()))
+        
+        return responses
+
+def test_serve():
+
+    p = MellHelper('serve')
+    p.create_project()
+    p.create_metadata('en', '{"greeting": "Hello"}')
+    p.create_metadata('pt', '{"greeting": "Ola"}')
+    p.create_template('index.txt', '|= meta.greeting =|, |= meta.name =|!')
+    p.create_template('other.txt', 'other')
+
+    socket_path = os.path.join(p.root_path, 'mell.sock')
+    process = p.spawn(f'--root {p.root_path} --serve {socket_path} --jobs 2 --set name Ana')
+
+    try:
+        assert wait_for(lambda: os.path.exists(socket_path))
+
+        first, second = send_requests(socket_path, 
+            {'id': 1, 'metadata': 'en', 'templates': ['index.txt']},
+            {'id': 2, 'metadata': 'en', 'templates': ['index.txt'], 'set': [['name', 'Bia']]})
+        
+        assert first['ok'] and first['id'] == 1
+        assert first['files'] == {'index.txt': 'Hello, Ana!'}
+        assert first['cache'] == {'meta': 'miss', 'style': 'miss'}
+        assert second['files'] == {'index.txt': 'Hello, Bia!'}
+        assert second['cache'] == {'meta': 'miss', 'style': 'hit'}
+
+        # Concurrent requests, from different connections
+        with ThreadPoolExecutor(4) as executor:
+            responses = list(executor.map(lambda name: send_requests(socket_path, {'metadata': name})[0], ['en', 'pt'] * 4))
+        
+        assert all(x['ok'] for x in responses)
+        assert responses[0]['cache']['meta'] in ['hit', 'miss']
+        assert [x['files']['index.txt'] for x in responses] == ['Hello, Ana!', 'Ola, Ana!'] * 4
+        assert responses[-1]['files']['other.txt'] == 'other'
+
+        # Files are written when an output is given, and changed metadata is loaded again
+        p.create_metadata('en', '{"greeting": "Hi"}')
+        output_path = os.path.join(p.root_path, 'preview')
+        written, inline, failure, status = send_requests(socket_path, 
+            {'metadata': 'en', 'output': output_path},
+            {'meta': {'greeting': 'Hey'}, 'templates': ['index.txt']},
+            {'metadata': 'en', 'templates': ['missing.txt']},
+            {'op': 'status'})
+        
+        assert written['written'] == ['index.txt', 'other.txt']
+        assert written['cache']['meta'] == 'miss'
+        assert open(os.path.join(output_path, 'index.txt')).read() == 'Hi, Ana!'
+        assert inline['files'] == {'index.txt': 'Hey, Ana!'}
+        assert not failure['ok'] and 'missing.txt' in failure['error']
+        assert status['stats']['requests'] == 13
+        assert status['stats']['failures'] == 1
+        assert status['styles'] == 1
+
+        assert process.poll() is None
+    
+    finally:
+        process.kill()
+        process.wait()
+
+def test_serve_existing_file():
+
+    p = MellHelper('serve_existing_file')
+    p.create_project()
+
+    filepath = os.path.join(p.root_path, 'keep.txt')
+
+    with open(filepath, 'w') as fout:
+        fout.write('keep')
+
+    status, _, _ = p.exec(f'--root {p.root_path} --serve {filepath}')
+
+    assert status == 1
+
+    with open(filepath) as fin:
+        assert fin.read() == 'keep'
+
+def test_serve_style_changes():
+
+    p = MellHelper('serve_style_changes')
+    p.create_project()
+    p.create_metadata('en', '{"u": "Ana"}')
+    p.create_template('card.txt', '|? cache "k", meta.u ?|[|? include "part.txt" ?|]|? endcache ?|')
+    p.create_template('part.txt', 'v1')
+
+    socket_path = os.path.join(p.root_path, 'mell.sock')
+    process = p.spawn(f'--root {p.root_path} --serve {socket_path}')
+
+    try:
+        assert wait_for(lambda: os.path.exists(socket_path))
+
+        first, = send_requests(socket_path, {'metadata': 'en', 'templates': ['card.txt']})
+        assert first['files'] == {'card.txt': '[v1]'}
+
+        # Fragments using a changed template are rendered again
+        p.create_template('part.txt', 'v2')
+        second, = send_requests(socket_path, {'metadata': 'en', 'templates': ['card.txt', 'part.txt']})
+
+        assert second['files'] == {'card.txt': '[v2]', 'part.txt': 'v2'}
+        assert second['cache']['style'] == 'hit'
+    
+    finally:
+        process.kill()
+        process.wait()
@@ -0,0 +1,41 @@
+from subprocess import Popen, PIPE
+from utils import MellHelper
+
+import shlex
+import sys
+
+
+# Modules imported by mell itself, besides the ones python always loads. It
+# should only grow when a command needs something new during the startup.
+IMPORT_BUDGET = 80
+
+def imported_modules(params):
+
+    cmd = f'{sys.executable} -X importtime {params}'
+    process = Popen(shlex.split(cmd), stdout=PIPE, stderr=PIPE)
+    _, stderr = process.communicate()
+
+    assert process.returncode == 0
+
+    lines = stderr.decode('utf-8').splitlines()
+    return [line.split('|')[-1].strip() for line in lines if line.startswith('import time:')][1:]
+
+def test_startup_imports():
+
+    p = MellHelper('startup_imports')
+    p.create_project()
+    p.create_metadata('data', '{}')
+    p.create_static('logo.txt', 'logo')
+    p.create_template('index.txt', 'index')
+
+    baseline = imported_modules('-c pass')
+
+    for params in ['--version', f'--new {p.root_path}/other', f'--root {p.root_path} --do nothing data', f'--root {p.root_path} --do statics data']:
+        modules = imported_modules(f'{p.cmd} {params}')
+
+        assert not [x for x in modules if x.startswith('jinja2')], params
+        assert 'concurrent.futures' not in modules, params
+        assert len(modules) - len(baseline) <= IMPORT_BUDGET, params
+
+    modules = imported_modules(f'{p.cmd} --root {p.root_path} --do templates data')
+    assert 'jinja2' in modules
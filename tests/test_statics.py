@@ -0,0 +1,86 @@
+from utils import MellHelper
+
+import shutil
+import os
+
+
+def test_statics_sync():
+
+    p = MellHelper('statics_sync')
+    p.create_project()
+
+    for i in range(6):
+        p.create_static(f'fonts/font_{i}.ttf', f'font {i}')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} -v --sync --jobs 3 --do statics')
+
+    assert status == 0
+    assert stderr == ''
+    assert 'Copied 6 static file(s), skipped 0' in stdout
+    assert p.read_output_file('fonts/font_3.ttf') == 'font 3'
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --sync --jobs 3 --do statics')
+
+    assert status == 0
+    assert 'Copied 0 static file(s), skipped 6' in stdout
+
+    # Same size and modification time, but a different content
+    filepath = p.create_static('fonts/font_1.ttf', 'FONT 1')
+    shutil.copystat(filepath, os.path.join(p.output_path, 'fonts', 'font_1.ttf'))
+    p.create_static('fonts/font_2.ttf', 'font 2, bigger')
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --sync --do statics')
+
+    assert status == 0
+    assert 'Copied 1 static file(s), skipped 5' in stdout
+    assert p.read_output_file('fonts/font_1.ttf') == 'font 1'
+    assert p.read_output_file('fonts/font_2.ttf') == 'font 2, bigger'
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --sync --sync-hash --do statics')
+
+    assert status == 0
+    assert 'Copied 1 static file(s), skipped 5' in stdout
+    assert p.read_output_file('fonts/font_1.ttf') == 'FONT 1'
+
+    # Edited within the same second, with the same size
+    filepath = p.create_static('fonts/font_4.ttf', 'FONT 4')
+    stat = os.stat(os.path.join(p.output_path, 'fonts', 'font_4.ttf'))
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --sync --do statics')
+
+    assert status == 0
+    assert 'Copied 1 static file(s), skipped 5' in stdout
+    assert p.read_output_file('fonts/font_4.ttf') == 'FONT 4'
+
+    # --sync-hash implies --sync
+    p.write_output_file('fonts/font_5.ttf', 'FONT 5')
+
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --sync-hash --do statics')
+
+    assert status == 0
+    assert 'Copied 1 static file(s), skipped 5' in stdout
+    assert p.read_output_file('fonts/font_5.ttf') == 'font 5'
+
+def test_mellignore():
+
+    p = MellHelper('mellignore')
+    p.create_project()
+    p.create_metadata('data', '{}')
+    p.create_static('logo.txt', 'logo')
+    p.create_static('logo.txt~', 'backup')
+    p.create_static('.hidden.txt', 'hidden')
+    p.create_static('node_modules/lib/index.js', 'js')
+    p.create_static('vendor/keep.txt', 'keep')
+    p.create_static('vendor/skip.txt', 'skip')
+    p.create_template('index.txt', 'index')
+    p.create_template('drafts/index.txt', 'draft')
+
+    with open(os.path.join(p.style_path, '.mellignore'), 'w') as fout:
+        fout.write('# Editor backups\n*~\n\nnode_modules/\nstatics/vendor/skip.txt\ntemplates/drafts\n')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} data')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.list_output_files() == ['index.txt', 'logo.txt', os.path.join('vendor', 'keep.txt')]
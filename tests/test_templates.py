@@ -0,0 +1,275 @@
+from utils import MellHelper, unindent
+
+import subprocess
+import json
+import glob
+import sys
+import os
+
+
+def test_bytecode_cache():
+
+    meta_name = 'data'
+
+    p = MellHelper('bytecode_cache')
+    p.create_project()
+    p.create_metadata(meta_name, '{"name": "mell"}')
+    p.create_template('hello.txt', 'Hello |= meta.name =|!')
+
+    cache_path = os.path.join(p.root_path, '.mell', 'bytecode')
+
+    for _ in range(2):
+        status, stdout, stderr = p.exec(f'--root {p.root_path} --bytecode-cache {meta_name}')
+
+        assert status == 0
+        assert stderr == ''
+        assert stdout == ''
+        assert p.read_output_file('hello.txt') == 'Hello mell!'
+    
+    assert len(glob.glob(os.path.join(cache_path, '*', '*.cache'))) == 1
+
+    # Custom delimiters must not reuse the bytecode compiled for the default ones
+    p.create_template('hello.txt', 'Hello {{ meta.name }}!')
+    status, _, _ = p.exec(f'--root {p.root_path} --bytecode-cache --variable_start "{{{{" --variable_end "}}}}" {meta_name}')
+
+    assert status == 0
+    assert p.read_output_file('hello.txt') == 'Hello mell!'
+    assert len(glob.glob(os.path.join(cache_path, '*'))) == 2
+
+def test_frozen_style():
+
+    meta_name = 'data'
+
+    p = MellHelper('frozen_style')
+    p.create_project()
+    p.create_metadata(meta_name, '{"name": "mell"}')
+    p.create_template('a.txt', '|? include "b.txt" ?| and a')
+    p.create_template('b.txt', '|= meta.name =|')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --frozen --template-cache-size 1 {meta_name}')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('a.txt') == 'mell and a'
+    assert p.read_output_file('b.txt') == 'mell'
+
+def test_parallel_templates():
+
+    meta_name = 'data'
+    
+    p = MellHelper('parallel_templates')
+    p.create_project()
+    p.create_metadata(meta_name, '{"items": [1, 2, 3]}')
+
+    for i in range(20):
+        p.create_template(f'folder_{i % 3}/file_{i}.txt', f'|? for x in meta.items ?||= x =|-{i},|? endfor ?|')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} {meta_name}')
+    assert status == 0
+    assert stderr == ''
+
+    serial = {relpath: p.read_output_file(relpath) for relpath in p.list_output_files()}
+    p.clean_output()
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --jobs 4 {meta_name}')
+    assert status == 0
+    assert stderr == ''
+
+    parallel = {relpath: p.read_output_file(relpath) for relpath in p.list_output_files()}
+
+    assert len(serial) == 20
+    assert serial == parallel
+    assert parallel['folder_1/file_7.txt'] == '1-7,2-7,3-7,'
+
+def test_parallel_templates_failure():
+
+    meta_name = 'data'
+    
+    p = MellHelper('parallel_templates_failure')
+    p.create_project()
+    p.create_metadata(meta_name, '{}')
+    p.create_template('good.txt', 'good')
+    p.create_template('bad.txt', '|= meta.missing.call() =|')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --jobs 2 {meta_name}')
+
+    assert status == 1
+    assert "ERROR: Failed to render the template(s): bad.txt" in stdout
+    assert 'Traceback' in stderr
+
+def test_only_changed():
+
+    meta_name = 'data'
+    
+    p = MellHelper('only_changed')
+    p.create_project()
+    p.create_metadata(meta_name, '{"a": "one", "b": "two"}')
+    p.create_template('a.txt', '|= meta.a =|')
+    p.create_template('b.txt', '|= meta.b =|')
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --only-changed {meta_name}')
+
+    assert status == 0
+    assert stderr == ''
+
+    for relpath in ['a.txt', 'b.txt']:
+        os.utime(os.path.join(p.output_path, relpath), (1000000000, 1000000000))
+    
+    p.create_metadata(meta_name, '{"a": "one", "b": "three"}')
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --only-changed {meta_name}')
+
+    assert status == 0
+    assert 'Rewrote 1 output file(s), 1 unchanged' in stdout
+    assert os.path.getmtime(os.path.join(p.output_path, 'a.txt')) == 1000000000
+    assert os.path.getmtime(os.path.join(p.output_path, 'b.txt')) != 1000000000
+    assert p.read_output_file('b.txt') == 'three'
+
+def test_meta_wrapper():
+
+    meta_name = 'data'
+
+    template = unindent(8, """
+        |? for key, user in meta.users ?|
+        |= key =|: |= user.name =| |= user.tags|length =| |? for tag in user.tags ?||= tag =||? endfor ?|
+
+        |? endfor ?|
+        |? if not meta.missing.deeply.nested ?|missing|? endif ?|
+
+        |= meta.users.a.tags[1] =| |= meta.users['b'].name =| |= 'x' in meta.users.a.tags =| |= 'a' in meta.users =|
+        """)
+
+    expected = unindent(8, """
+        a: Ana 2 xy
+        b: Bia 0 
+        missing
+        y Bia True True""")
+
+    p = MellHelper('meta_wrapper')
+    p.create_project()
+    p.create_metadata(meta_name, '{"users": {"a": {"name": "Ana", "tags": ["x", "y"]}, "b": {"name": "Bia", "tags": []}}}')
+    p.create_template('users.txt', template)
+
+    status, _, stderr = p.exec(f'--root {p.root_path} {meta_name}')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('users.txt') == expected
+
+def test_profile():
+
+    p = MellHelper('profile')
+    p.create_project()
+    p.create_metadata('data', '{"name": "Gold"}')
+    p.create_template('a.txt', '|= meta.name =|')
+    p.create_template('b.txt', 'b')
+    p.create_static('logo.txt', 'logo')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} --profile --jobs 2 data')
+
+    assert status == 0
+    assert stderr == ''
+    assert stdout.startswith('Profile:\n')
+
+    with open(os.path.join(p.root_path, '.mell', 'profile.json')) as fin:
+        events = json.loads(fin.read())['traceEvents']
+    
+    spans = sorted((x['cat'], x['name']) for x in events if x['cat'] in ['template', 'static'])
+
+    assert spans == [('static', os.path.join(p.output_path, 'logo.txt')), ('template', 'a.txt'), ('template', 'b.txt')]
+    assert all(x['ph'] == 'X' and x['dur'] >= 0 and 'cpu_ms' in x['args'] for x in events)
+
+def test_stream():
+
+    generator_script = unindent(8, """
+        def generate(args, meta, inflater):
+            assert (inflater.inflate('row.txt', meta, to_file='a.txt') is None) == args.stream
+            text = inflater.inflate('row.txt', meta, to_file='b.txt', return_text=True)
+            inflater.inflate('row.txt', meta, to_file='c.txt', return_text=len(text) > 0)
+        """)
+
+    p = MellHelper('stream')
+    p.create_project()
+    p.create_metadata('data', '{"rows": 300000}')
+    p.create_template('big.txt', '|? for i in range(meta.rows) ?||= "%095d" % i =|\n|? endfor ?|')
+    p.create_asset('row.txt', 'row |= meta.rows =|')
+    p.create_generator('rows', generator_script)
+
+    # The peak is measured from a small launcher, as a child forked from pytest 
+    # itself may be charged for the memory of pytest
+
+    launcher = 'import os, subprocess, sys; p = subprocess.Popen(sys.argv[1:]); _, status, rusage = os.wait4(p.pid, 0); print(os.waitstatus_to_exitcode(status), rusage.ru_maxrss)'
+
+    def run(params):
+        output = subprocess.check_output([sys.executable, '-c', launcher, p.cmd, '--root', p.root_path, *params, 'data'])
+        status, peak = output.split()[-2:]
+        assert status == b'0'
+        return int(peak), p.read_output_file('big.txt')
+
+    peak, expected = run([])
+    stream_peak, text = run(['--stream'])
+
+    # About 30MB are written without holding the whole text in memory
+    assert text == expected
+    assert len(text) == 300000 * 96
+    assert stream_peak < peak - 20 * 1024
+    assert [p.read_output_file(x) for x in ['a.txt', 'b.txt', 'c.txt']] == ['row 300000'] * 3
+
+    status, _, stderr = p.exec(f'--root {p.root_path} --stream --only-changed --do templates data')
+
+    assert status == 0
+    assert stderr == ''
+    assert p.read_output_file('big.txt') == expected
+    assert not os.path.exists(os.path.join(p.output_path, 'big.txt.tmp'))
+
+    # A render failing halfway keeps the previous output
+    p.create_template('big.txt', '|? for i in range(3) ?|row |= i =|\n|? endfor ?||= 1 // meta.zero =|')
+    status, _, _ = p.exec(f'--root {p.root_path} --stream --do templates data --set zero 0')
+
+    assert status != 0
+    assert p.read_output_file('big.txt') == expected
+    assert not os.path.exists(os.path.join(p.output_path, 'big.txt.tmp'))
+
+def test_fragment_cache():
+
+    p = MellHelper('fragment_cache')
+    p.create_project()
+    p.create_metadata('data', '{"title": "Old", "users": [{"name": "Ana & Bia"}, {"name": "Bob"}, {"name": "Bob"}]}')
+    p.create_template('page.html', '|? for user in meta.users ?||? cache "card", user ?|<b>|= user.name =| |= meta.title =|</b>|? endcache ?||? endfor ?|')
+    p.create_template('copy.html', '|? for user in meta.users ?||? cache "card", user ?|<b>|= user.name =| |= meta.title =|</b>|? endcache ?||? endfor ?|')
+
+    status, stdout, stderr = p.exec(f'--root {p.root_path} -v --fragment-cache data')
+
+    assert status == 0
+    assert stderr == ''
+    assert 'Fragment cache: 4 hit(s), 2 miss(es)' in stdout
+    assert p.read_output_file('page.html') == '<b>Ana &amp; Bia Old</b><b>Bob Old</b><b>Bob Old</b>'
+    assert p.read_output_file('copy.html') == p.read_output_file('page.html')
+
+    # The title is not part of the key, so the fragments stored on disk are 
+    # reused, while the changed user is rendered again
+
+    p.create_metadata('data', '{"title": "New", "users": [{"name": "Ana & Bia"}, {"name": "Carl"}]}')
+    status, stdout, _ = p.exec(f'--root {p.root_path} -v --fragment-cache --do templates data')
+
+    assert status == 0
+    assert 'Fragment cache: 3 hit(s), 1 miss(es)' in stdout
+    assert p.read_output_file('page.html') == '<b>Ana &amp; Bia Old</b><b>Carl New</b>'
+
+    status, _, _ = p.exec(f'--root {p.root_path} --fragment-cache-size 0 --do templates data')
+
+    assert status == 0
+    assert p.read_output_file('page.html') == '<b>Ana &amp; Bia New</b><b>Carl New</b>'
+
+    # Templates used inside the block are part of the key
+    p.create_template('card.txt', '|? cache "card", meta.user ?|[|? include "part.txt" ?|]|? endcache ?|')
+
+    for version in ['v1', 'v2']:
+        p.create_template('part.txt', version)
+        status, _, _ = p.exec(f'--root {p.root_path} --fragment-cache --fragment-cache-limit 3 --do templates data')
+
+        assert status == 0
+        assert p.read_output_file('card.txt') == f'[{version}]'
+    
+    # Only the most recently used fragments are kept on disk
+    fragments = glob.glob(os.path.join(p.root_path, '.mell', 'fragments', '*', '*', '*'))
+    assert len(fragments) == 3
@@ -0,0 +1,52 @@
+from utils import MellHelper, wait_for
+
+import os
+
+
+def test_watch():
+
+    meta_name = 'data'
+
+    p = MellHelper('watch')
+    p.create_project()
+    p.create_metadata(meta_name, '{"a": "one", "b": "two"}')
+    p.create_template('a.txt', '|= meta.a =|')
+    p.create_template('b.txt', '|= meta.b =|')
+    p.create_template('c.txt', '|= inflater.inflate("card.txt", meta) =|')
+    p.create_asset('card.txt', 'card |= meta.a =|')
+
+    process = p.spawn(f'--root {p.root_path} --watch --watch-interval 0.1 {meta_name}')
+
+    def output_is(relpath, expected):
+        filepath = os.path.join(p.output_path, relpath)
+        return lambda: os.path.exists(filepath) and open(filepath).read() == expected
+
+    try:
+        assert wait_for(output_is('a.txt', 'one'))
+        assert wait_for(output_is('b.txt', 'two'))
+
+        # Only the template that changed is rendered again
+        p.write_output_file('a.txt', 'edited')
+        p.create_template('b.txt', '[|= meta.b =|]')
+
+        assert wait_for(output_is('b.txt', '[two]'))
+        assert p.read_output_file('a.txt') == 'edited'
+
+        # A change in the metadata renders everything again
+        p.create_metadata(meta_name, '{"a": "three", "b": "four"}')
+
+        assert wait_for(output_is('a.txt', 'three'))
+        assert wait_for(output_is('b.txt', '[four]'))
+
+        # A change in an asset renders again the templates inflating it
+        p.write_output_file('a.txt', 'edited')
+        p.create_asset('card.txt', '[card |= meta.a =|]')
+
+        assert wait_for(output_is('c.txt', '[card three]'))
+        assert p.read_output_file('a.txt') == 'edited'
+
+        assert process.poll() is None
+    
+    finally:
+        process.kill()
+        process.wait()
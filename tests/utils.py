@@ -4,6 +4,7 @@ from subprocess import Popen, PIPE
 import shutil
 import shlex
 import glob
+import time
 import os
 
 
@@ -45,6 +46,11 @@ class MellHelper:
 
         return returncode, stdout, stderr
 
+    def spawn(self, params):
+
+        cmd = f'{self.cmd} {params}'
+        return Popen(shlex.split(cmd), stdout=PIPE, stderr=PIPE)
+
     def create_project(self):
 
         self.delete()
@@ -53,6 +59,8 @@ class MellHelper:
     def create_metadata(self, meta_name, meta_data):
 
         meta_filepath = os.path.join(self.meta_path, meta_name + '.json')
+        os.makedirs(os.path.dirname(meta_filepath), exist_ok=True)
+        
         with open(meta_filepath, 'w') as fout:
             fout.write(meta_data)
         
@@ -99,6 +107,33 @@ class MellHelper:
 
         return filepath
 
+    def create_template(self, relpath, data):
+
+        filepath = os.path.join(self.templates_path, relpath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        
+        with open(filepath, 'w') as fout:
+            fout.write(data)
+
+        return filepath
+
+    def create_static(self, relpath, data):
+
+        filepath = os.path.join(self.statics_path, relpath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        
+        with open(filepath, 'w') as fout:
+            fout.write(data)
+
+        return filepath
+
+    def write_output_file(self, relpath, data):
+        filepath = os.path.join(self.output_path, relpath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        with open(filepath, 'w') as fout:
+            fout.write(data)
+
     def read_output_file(self, relpath):
         filepath = os.path.join(self.output_path, relpath)
 
@@ -107,6 +142,32 @@ class MellHelper:
         with open(filepath, 'r') as fin:
             return fin.read()
 
+    def list_output_files(self):
+
+        relpaths = []
+        
+        for filepath in glob.glob(os.path.join(self.output_path, '**'), recursive=True):
+            if os.path.isfile(filepath):
+                relpaths.append(os.path.relpath(filepath, self.output_path))
+        
+        return sorted(relpaths)
+
+    def clean_output(self):
+
+        shutil.rmtree(self.output_path)
+        os.makedirs(self.output_path)
+
+def wait_for(condition, timeout=10.0):
+
+    deadline = time.time() + timeout
+
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    
+    return False
+
 def file_count(folderpath):
 
     filepaths = glob.glob(os.path.join(folderpath, '*'))
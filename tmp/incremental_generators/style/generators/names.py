@@ -0,0 +1,3 @@
+def generate(args, meta, inflater):
+    for i, name in enumerate(meta.names):
+        inflater.inflate('name.txt', name, to_file=f'name_{i}.txt')
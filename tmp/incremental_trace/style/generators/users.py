@@ -0,0 +1,3 @@
+def generate(args, meta, inflater):
+    for i, user in enumerate(meta.users):
+        inflater.inflate('user.txt', user, to_file=f'user_{i}.txt')
@@ -0,0 +1,3 @@
+def generate(args, meta, inflater):
+    print('Generating', meta.name)
+    inflater.inflate('name.txt', meta, to_file='b.txt')
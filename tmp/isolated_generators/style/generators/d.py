@@ -0,0 +1,2 @@
+def generate(args, meta, inflater):
+    meta.name = 'changed'
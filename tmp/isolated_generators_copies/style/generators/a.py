@@ -0,0 +1,3 @@
+def generate(args, meta, inflater):
+    meta.value['seen'] = 'a'
+    meta.value['users'].append('Bia')
@@ -0,0 +1,2 @@
+def generate(args, meta, inflater):
+    print('b sees', meta.value.get('seen'), len(meta.users))
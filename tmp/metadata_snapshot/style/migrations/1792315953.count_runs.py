@@ -0,0 +1,2 @@
+def migrate(args, meta):
+    meta.runs = meta.runs + 2
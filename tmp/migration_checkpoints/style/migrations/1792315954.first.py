@@ -0,0 +1,6 @@
+import os
+
+def migrate(args, meta):
+    with open(os.path.join(args.root, 'runs.txt'), 'a') as fout:
+        fout.write('first\n')
+    meta.total = meta.total + 1
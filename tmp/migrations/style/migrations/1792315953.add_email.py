@@ -0,0 +1,3 @@
+def migrate(args, meta):
+    for user in meta.users:
+        user.email = user.name.lower() + "@company.com"
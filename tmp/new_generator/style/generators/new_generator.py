@@ -0,0 +1,3 @@
+def generate(args, meta, inflator):
+    pass
+
@@ -0,0 +1,3 @@
+def migrate(args, meta):
+    pass
+
@@ -0,0 +1,3 @@
+def generate(args, meta, inflater):
+    for i, project in enumerate(meta.projects):
+        inflater.inflate('project.txt', project, to_file=f'project_{i}.txt')
@@ -0,0 +1,2 @@
+def generate(args, meta, inflater):
+    inflater.inflate("g.txt", meta, to_file="g.txt")
@@ -0,0 +1,4 @@
+def generate(args, meta, inflater):
+    assert (inflater.inflate('row.txt', meta, to_file='a.txt') is None) == args.stream
+    text = inflater.inflate('row.txt', meta, to_file='b.txt', return_text=True)
+    inflater.inflate('row.txt', meta, to_file='c.txt', return_text=len(text) > 0)